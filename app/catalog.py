@@ -0,0 +1,46 @@
+"""Columnar catalog metadata used to enrich recommendation responses."""
+from __future__ import annotations
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+from . import schemas
+
+ItemKey = Tuple[str, int]
+
+
+class CatalogMeta:
+    """
+    Display metadata for every catalog item as parallel column arrays,
+    row-aligned with the content model so lookups never touch the database.
+    """
+
+    def __init__(
+        self,
+        media_type: Sequence[str],
+        tmdb_id: Sequence[int],
+        title: Sequence[str],
+        poster_path: Sequence[str],
+    ) -> None:
+        self.media_type = np.asarray(media_type, dtype=object)
+        self.tmdb_id = np.asarray(tmdb_id, dtype=np.int64)
+        self.title = np.asarray(title, dtype=object)
+        self.poster_path = np.asarray(poster_path, dtype=object)
+        self.key2row: Dict[ItemKey, int] = {
+            (mt, int(t)): i for i, (mt, t) in enumerate(zip(self.media_type, self.tmdb_id))
+        }
+
+    def __len__(self) -> int:
+        return len(self.tmdb_id)
+
+    def items(self, ranked: Sequence[Tuple[ItemKey, float]]) -> List[schemas.RecommendationItem]:
+        out: List[schemas.RecommendationItem] = []
+        for (mt, tid), score in ranked:
+            row = self.key2row.get((mt, tid))
+            out.append(schemas.RecommendationItem(
+                tmdb_id=tid,
+                media_type=mt,
+                title=self.title[row] if row is not None else None,
+                poster_path=self.poster_path[row] if row is not None else None,
+                score=score,
+            ))
+        return out
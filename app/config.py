@@ -1,4 +1,5 @@
 import os
+from typing import Dict, Literal, Optional
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 from functools import lru_cache
@@ -7,10 +8,86 @@ load_dotenv(dotenv_path=os.path.join(os.getcwd(), ".env"))
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Optional read replica for training scans and recommendation reads
+    DATABASE_READ_URL: Optional[str] = None
+
+    # Connection pools (per engine); recycle/timeout in seconds
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_READ_POOL_SIZE: int = 5
+    DB_READ_MAX_OVERFLOW: int = 5
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: int = 30
+
+    # Startup: create missing tables (turn off when migrations own the schema),
+    # and retry a failed background engine warmup every WARMUP_RETRY_INTERVAL s
+    DB_CREATE_ALL: bool = True
+    WARMUP_RETRY_INTERVAL: float = 10.0
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # bcrypt runs on its own AUTH_HASH_WORKERS threads; beyond AUTH_HASH_MAX_PENDING
+    # queued or running hashes, login/register answer 503
+    AUTH_HASH_WORKERS: int = 2
+    AUTH_HASH_MAX_PENDING: int = 64
+
+    # Google sign-in: ID tokens are checked against this OAuth client id (the
+    # endpoint answers 503 when it is unset); signing keys are cached for the
+    # certs response's max-age, or GOOGLE_JWKS_TTL seconds when it has none
+    GOOGLE_CLIENT_ID: Optional[str] = None
+    GOOGLE_JWKS_TTL: int = 3600
+
+    # Interaction weighting: per action_type weight, ratings rescaled to [0, 1]
+    # between RATING_MIN and RATING_MAX (so the lowest rating carries no signal).
+    # Unknown action types weigh 1.0.
+    ACTION_WEIGHTS: Dict[str, float] = {"rating": 1.0, "like": 1.0, "watchlist": 0.4}
+    RATING_MIN: int = 1
+    RATING_MAX: int = 5
+
+    # /for-you ranking: candidate pool size, MMR window, per-user ranked list cache
+    RECS_CANDIDATES: int = 200
+    RECS_MMR_K: int = 30
+    RECS_MMR_LAMBDA: float = 0.7  # relevance vs. diversity in the MMR head
+    RECS_CACHE_SIZE: int = 10000
+    RECS_CACHE_TTL: int = 600  # seconds
+    RECS_CACHE_PAGES: int = 8  # encoded response pages kept per cached list
+
+    # Session boost for /for-you: the last SESSION_SIZE actions per user (kept in
+    # memory for SESSION_MAX_USERS users) score items through the precomputed
+    # neighbor lists, halving in influence every SESSION_HALF_LIFE seconds, and
+    # are added to the blend with weight SESSION_WEIGHT (0 = off)
+    SESSION_SIZE: int = 20
+    SESSION_MAX_USERS: int = 100000
+    SESSION_HALF_LIFE: float = 1800.0
+    SESSION_WEIGHT: float = 0.1
+
+    # Content model text features: "tfidf" keeps an exact vocabulary, "hashing"
+    # hashes terms into CONTENT_HASH_FEATURES columns (constant vectorizer memory)
+    CONTENT_VECTORIZER: Literal["tfidf", "hashing"] = "tfidf"
+    CONTENT_HASH_FEATURES: int = 2 ** 20
+
+    # Sharded item-item CF (0 = one in-memory matrix): item_sim is split into
+    # CF_SHARDS column blocks under CF_SHARD_DIR and memory-mapped; scoring keeps
+    # each user's top CF_SHARD_TOP_N CF items
+    CF_SHARDS: int = 0
+    CF_SHARD_DIR: str = ".cache/cf_shards"
+    CF_SHARD_TOP_N: int = 1000
+
+    # Worker processes for scoring (0 = score in the request thread)
+    SCORING_WORKERS: int = 0
+
+    # Write-behind ingestion for POST /user/actions/batch: queue and upsert in
+    # batches of up to ACTIONS_FLUSH_BATCH rows every ACTIONS_FLUSH_INTERVAL s;
+    # beyond ACTIONS_BUFFER_MAX queued actions the endpoint answers 503
+    ACTIONS_WRITE_BEHIND: bool = False
+    ACTIONS_FLUSH_BATCH: int = 1000
+    ACTIONS_FLUSH_INTERVAL: float = 1.0
+    ACTIONS_BUFFER_MAX: int = 100000
+
+    # Responses smaller than this many bytes are sent uncompressed
+    GZIP_MIN_SIZE: int = 1024
+
 @lru_cache()
 def get_settings() -> Settings:
     return Settings()
@@ -1,4 +1,7 @@
-from typing import Optional, List, Tuple
+from datetime import datetime
+from typing import Dict, Iterable, Optional, List, Sequence, Set, Tuple
+from sqlalchemy import case, func, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
@@ -16,8 +19,15 @@ def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
 def get_user_by_google_id(db: Session, google_id: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.google_id == google_id).first()
 
-def create_user(db: Session, user_in: schemas.UserCreate) -> models.User:
-    pwd_hash = hash_password(user_in.password) if user_in.password else None
+def create_user(
+    db: Session,
+    user_in: schemas.UserCreate,
+    password_hash: Optional[str] = None,
+) -> models.User:
+    """password_hash, when given, is used instead of hashing user_in.password here."""
+    pwd_hash = password_hash
+    if pwd_hash is None and user_in.password:
+        pwd_hash = hash_password(user_in.password)
     db_user = models.User(
         email=user_in.email,
         password_hash=pwd_hash,
@@ -78,6 +88,37 @@ def create_user_action(
     obj, _ = create_or_update_user_action(db, user_id, action)
     return obj
 
+def upsert_user_actions(db: Session, rows: Iterable[Dict]) -> int:
+    """
+    Bulk create-or-update in one INSERT ... ON CONFLICT statement. Rows are
+    dicts with user_id, tmdb_movie_id, action_type and rating, unique on the
+    first three; like create_or_update_user_action, only ratings are updated.
+    Does not commit.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    stmt = pg_insert(models.UserMovieAction).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "tmdb_movie_id", "action_type"],
+        set_={
+            "rating": case(
+                (stmt.excluded.action_type == "rating", stmt.excluded.rating),
+                else_=models.UserMovieAction.rating,
+            ),
+        },
+    )
+    db.execute(stmt)
+    return len(rows)
+
+def get_unknown_movie_ids(db: Session, tmdb_ids: Iterable[int]) -> Set[int]:
+    ids = set(tmdb_ids)
+    known = {
+        t for (t,) in db.query(models.Movie.tmdb_movie_id)
+                        .filter(models.Movie.tmdb_movie_id.in_(ids)).all()
+    }
+    return ids - known
+
 def get_user_actions(
     db: Session,
     user_id: int,
@@ -87,3 +128,39 @@ def get_user_actions(
     if action_type:
         q = q.filter_by(action_type=action_type)
     return q.all()
+
+def get_action_watermark(db: Session, user_id: int) -> Tuple[int, Optional[int], Optional[int]]:
+    """
+    (count, newest id, rating sum) of a user's actions: changes whenever an
+    action is added, removed or re-rated, for validating cached rankings.
+    """
+    A = models.UserMovieAction
+    count, max_id, rating_sum = (
+        db.query(func.count(A.id), func.max(A.id), func.sum(A.rating)).filter(A.user_id == user_id).one()
+    )
+    return int(count), max_id, None if rating_sum is None else int(rating_sum)
+
+def get_user_actions_page(
+    db: Session,
+    user_id: int,
+    action_type: Optional[str] = None,
+    limit: int = 100,
+    before: Optional[Tuple[datetime, int]] = None,
+    fields: Sequence[str] = schemas.USER_ACTION_FIELDS,
+) -> List[Dict]:
+    """
+    Newest-first page of a user's actions as plain dicts of the requested
+    columns (created_at and id are always included for the next cursor).
+    `before` is the (created_at, id) of the last row of the previous page.
+    """
+    names = list(dict.fromkeys([*fields, "created_at", "id"]))
+    cols = [getattr(models.UserMovieAction, name) for name in names]
+    q = db.query(*cols).filter(models.UserMovieAction.user_id == user_id)
+    if action_type:
+        q = q.filter(models.UserMovieAction.action_type == action_type)
+    if before is not None:
+        q = q.filter(
+            tuple_(models.UserMovieAction.created_at, models.UserMovieAction.id) < tuple_(*before)
+        )
+    q = q.order_by(models.UserMovieAction.created_at.desc(), models.UserMovieAction.id.desc())
+    return [dict(zip(names, row)) for row in q.limit(limit).all()]
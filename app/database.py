@@ -1,17 +1,84 @@
-from sqlalchemy import create_engine
+from typing import Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from .config import settings
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+
+def _create_engine(url: str, pool_size: int, max_overflow: int, read_only: bool = False) -> Engine:
+    kwargs = {"pool_pre_ping": True}
+    backend = make_url(url).get_backend_name()
+    if backend != "sqlite":  # sqlite's default pools take no sizing
+        kwargs.update(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    eng = create_engine(url, **kwargs)
+    if read_only and backend == "postgresql":
+        eng = eng.execution_options(postgresql_readonly=True)
+    _checkouts[eng.pool] = 0
+    event.listen(eng.pool, "checkout", _count_checkout(eng.pool))
+    return eng
+
+
+# ---------- Pool metrics ----------
+_checkouts: Dict[object, int] = {}
+
+
+def _count_checkout(pool):
+    def _on_checkout(_dbapi_conn, _record, _proxy):
+        _checkouts[pool] += 1
+    return _on_checkout
+
+
+def pool_status(eng: Engine) -> Dict[str, Optional[int]]:
+    """Connection pool utilization; sizing fields are None for pools without them (sqlite)."""
+    pool = eng.pool
+    stats: Dict[str, Optional[int]] = {"checkouts_total": _checkouts.get(pool, 0)}
+    for name, attr in (("size", "size"), ("checked_in", "checkedin"), ("checked_out", "checkedout"), ("overflow", "overflow")):
+        fn = getattr(pool, attr, None)
+        stats[name] = fn() if fn is not None else None
+    return stats
+
+
+# Primary: request-path reads and all writes.
+engine = _create_engine(settings.DATABASE_URL, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
+# Reads for training scans and recommendations, on the replica when one is
+# configured; a separate pool either way, so long scans can't starve requests.
+read_engine = _create_engine(
+    settings.DATABASE_READ_URL or settings.DATABASE_URL,
+    settings.DB_READ_POOL_SIZE,
+    settings.DB_READ_MAX_OVERFLOW,
+    read_only=True,
+)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
+
+def init_db() -> None:
+    """Create missing tables on the primary (no-op for existing ones)."""
+    from . import models  # noqa: F401  registers the tables on Base
+    Base.metadata.create_all(bind=engine)
+
 # Helper function for dependency injection of the database session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Same for read-only work; may lag the primary when it points at a replica
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
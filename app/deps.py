@@ -1,7 +1,7 @@
 from fastapi import Depends
 from sqlalchemy.orm import Session
-from .database import get_db
-from .recommenders.hybrid import get_recommender, _meta_key
+from .database import get_read_db
 
-def recommender_dep(db: Session = Depends(get_db)):
-    return get_recommender(db, _meta_key())
\ No newline at end of file
+def recommender_dep(db: Session = Depends(get_read_db)):
+    from .recommenders.engine import Engine  # heavy; imported on first use
+    return Engine.get_cached(db)
@@ -0,0 +1,42 @@
+"""Top-k ranking metrics computed over all evaluated users at once."""
+from __future__ import annotations
+from typing import Dict, Sequence
+import numpy as np
+from scipy import sparse
+
+
+def hit_matrix(recs: np.ndarray, relevant: sparse.csr_matrix) -> np.ndarray:
+    """
+    recs is (n_users × n) catalog rows in rank order, -1 padded; relevant is
+    (n_users × n_items) with non-zeros on held-out items. True where a
+    recommendation is relevant.
+    """
+    hits = np.zeros(recs.shape, dtype=bool)
+    valid = recs >= 0
+    users = np.broadcast_to(np.arange(recs.shape[0])[:, None], recs.shape)
+    hits[valid] = np.asarray(relevant[users[valid], recs[valid]]).ravel() > 0
+    return hits
+
+
+def ranking_metrics(
+    recs: np.ndarray,
+    relevant: sparse.csr_matrix,
+    ks: Sequence[int],
+    n_items: int,
+) -> Dict[str, float]:
+    """Mean precision, recall and NDCG @k over users, plus catalog coverage @k."""
+    hits = hit_matrix(recs, relevant)
+    n_relevant = np.diff(relevant.indptr)
+    out: Dict[str, float] = {}
+    for k in ks:
+        h = hits[:, :k]
+        n_hits = h.sum(axis=1)
+        discounts = 1.0 / np.log2(np.arange(2, k + 2))
+        ideal = np.cumsum(discounts)[np.clip(n_relevant, 1, k) - 1]
+        top = recs[:, :k]
+
+        out[f"precision@{k}"] = float(np.mean(n_hits / k))
+        out[f"recall@{k}"] = float(np.mean(n_hits / np.maximum(n_relevant, 1)))
+        out[f"ndcg@{k}"] = float(np.mean((h @ discounts) / ideal))
+        out[f"coverage@{k}"] = len(np.unique(top[top >= 0])) / max(n_items, 1)
+    return out
@@ -0,0 +1,210 @@
+"""
+Offline evaluation of the recommendation engine.
+
+Splits user_movie_actions by time, trains the engine on the older part and
+checks its top-k lists against what each user went on to like in the newer
+part. Run with `python -m app.evaluation.offline --k 10,20`.
+"""
+from __future__ import annotations
+import argparse, json, logging, resource, time
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import ReadSessionLocal
+from ..interactions import action_weights, build_interactions, item_columns
+from ..models import UserMovieAction
+from ..recommenders.base import TrainingData
+from ..recommenders.engine import ALPHA, Engine, POPULARITY_WEIGHT
+from .metrics import ranking_metrics
+
+log = logging.getLogger(__name__)
+
+SCORE_CHUNK = 256
+
+
+class TimedActions(NamedTuple):
+    """Action log as column arrays; ts is created_at in epoch seconds."""
+    users: np.ndarray
+    tmdb: np.ndarray
+    weights: np.ndarray
+    ts: np.ndarray
+
+    def take(self, mask: np.ndarray) -> "TimedActions":
+        return TimedActions(*(col[mask] for col in self))
+
+    @property
+    def acts(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return self.users, self.tmdb, self.weights
+
+
+def load_timed_actions(db: Session) -> TimedActions:
+    rows = db.query(
+        UserMovieAction.user_id,
+        UserMovieAction.tmdb_movie_id,
+        UserMovieAction.action_type,
+        UserMovieAction.rating,
+        UserMovieAction.created_at,
+    ).all()
+    if not rows:
+        raise SystemExit("user_movie_actions is empty")
+    users, tmdb_ids, types, ratings, created = zip(*rows)
+    return TimedActions(
+        users=np.asarray(users, dtype=np.int64),
+        tmdb=np.asarray(tmdb_ids, dtype=np.int64),
+        weights=action_weights(np.asarray(types, dtype=object), np.asarray(ratings, dtype=np.float32)),
+        ts=np.asarray([c.timestamp() if c else 0.0 for c in created], dtype=np.float64),
+    )
+
+
+def time_split(
+    actions: TimedActions,
+    test_fraction: float = 0.2,
+    cutoff: Optional[float] = None,
+) -> Tuple[TimedActions, TimedActions, float]:
+    """Everything before the cutoff trains; the rest is held out. Default cutoff keeps the newest test_fraction."""
+    if cutoff is None:
+        cutoff = float(np.quantile(actions.ts, 1.0 - test_fraction))
+    test = actions.ts >= cutoff
+    return actions.take(~test), actions.take(test), cutoff
+
+
+def relevant_items(
+    engine: Engine,
+    train: TimedActions,
+    test: TimedActions,
+    min_weight: float,
+) -> Tuple[np.ndarray, sparse.csr_matrix]:
+    """
+    Test users and a (users × items) matrix of their held-out positives:
+    test actions of at least min_weight on items they had not touched in training.
+    """
+    pos = test.take(test.weights >= min_weight)
+    cols = item_columns(pos.tmdb, engine.movie_ids, engine.tv_ids)
+    pos, cols = pos.take(cols >= 0), cols[cols >= 0]
+    user_ids = np.unique(pos.users)
+    shape = (len(user_ids), engine.n_items)
+
+    relevant = sparse.csr_matrix(
+        (np.ones(len(cols), dtype=np.float32), (np.searchsorted(user_ids, pos.users), cols)), shape=shape,
+    )
+    in_train = np.isin(train.users, user_ids)
+    seen = build_interactions(
+        np.searchsorted(user_ids, train.users[in_train]),
+        item_columns(train.tmdb[in_train], engine.movie_ids, engine.tv_ids),
+        np.ones(int(in_train.sum()), dtype=np.float32),
+        shape=shape,
+    )
+    relevant = (relevant - relevant.multiply(seen > 0)).tocsr()
+    relevant.eliminate_zeros()
+
+    has_relevant = np.diff(relevant.indptr) > 0
+    return user_ids[has_relevant], relevant[has_relevant]
+
+
+def recommend(engine: Engine, user_ids: np.ndarray, train: TimedActions, n: int) -> np.ndarray:
+    """(n_users × n) catalog rows ranked by the engine from training actions, -1 padded."""
+    recs = np.full((len(user_ids), n), -1, dtype=np.int64)
+    for start in range(0, len(user_ids), SCORE_CHUNK):
+        chunk = user_ids[start:start + SCORE_CHUNK]
+        acts = train.take(np.isin(train.users, chunk)).acts
+        for r, (_uid, rows, _scores) in enumerate(engine.rank(chunk.tolist(), acts, n)):
+            recs[start + r, :len(rows)] = rows
+    return recs
+
+
+def model_bytes(engine: Engine) -> int:
+    total = 0
+    for arr in engine.shared_arrays().values():
+        if arr is None:
+            continue
+        if sparse.issparse(arr):
+            total += arr.data.nbytes + arr.indices.nbytes + arr.indptr.nbytes
+        else:
+            total += arr.nbytes
+    return total + engine.neighbors.idx.nbytes + engine.neighbors.score.nbytes
+
+
+def evaluate(
+    db: Session,
+    ks: Sequence[int] = (10,),
+    test_fraction: float = 0.2,
+    cutoff: Optional[float] = None,
+    min_weight: float = 0.4,
+    weights: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    train, test, cutoff = time_split(load_timed_actions(db), test_fraction, cutoff)
+    load_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    engine = Engine(TrainingData.from_db(db, train.acts), weights)
+    train_s = time.perf_counter() - t0
+
+    user_ids, relevant = relevant_items(engine, train, test, min_weight)
+    t0 = time.perf_counter()
+    recs = recommend(engine, user_ids, train, max(ks))
+    score_s = time.perf_counter() - t0
+
+    report: Dict[str, Any] = {
+        "cutoff": datetime.fromtimestamp(cutoff).isoformat(),
+        "train_actions": len(train.users),
+        "test_actions": len(test.users),
+        "eval_users": len(user_ids),
+        "cold_users": int((~np.isin(user_ids, train.users)).sum()),
+        "items": engine.n_items,
+        "weights": engine.weights,
+        "mmr_lambda": settings.RECS_MMR_LAMBDA,
+    }
+    report.update(ranking_metrics(recs, relevant, ks, engine.n_items))
+    report.update({
+        "load_s": load_s,
+        "train_s": train_s,
+        "score_s": score_s,
+        "users_per_s": len(user_ids) / score_s if score_s > 0 else float("inf"),
+        "model_mb": model_bytes(engine) / 2 ** 20,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # KiB on Linux
+    })
+    return report
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    width = max(len(k) for k in report)
+    for key, value in report.items():
+        if isinstance(value, float):
+            value = f"{value:.4f}"
+        print(f"{key:<{width}}  {value}")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-8s %(message)s")
+    ap = argparse.ArgumentParser(description="Offline evaluation on a time split of user_movie_actions")
+    ap.add_argument("--k", default="10", help="comma-separated cutoffs, e.g. 5,10,20")
+    ap.add_argument("--test-fraction", type=float, default=0.2, help="newest share of actions held out")
+    ap.add_argument("--cutoff", help="ISO timestamp to split at instead of --test-fraction")
+    ap.add_argument("--min-weight", type=float, default=0.4, help="smallest action weight counted as relevant")
+    ap.add_argument("--alpha", type=float, default=ALPHA, help="CF share of the CF/content blend")
+    ap.add_argument("--popularity", type=float, default=POPULARITY_WEIGHT)
+    ap.add_argument("--mmr-lambda", type=float, default=settings.RECS_MMR_LAMBDA)
+    ap.add_argument("--json", help="also write the report to this file")
+    args = ap.parse_args()
+
+    settings.RECS_MMR_LAMBDA = args.mmr_lambda
+    weights = {"cf": args.alpha, "content": 1.0 - args.alpha, "popularity": args.popularity}
+    cutoff = datetime.fromisoformat(args.cutoff).timestamp() if args.cutoff else None
+    ks = sorted({int(k) for k in args.k.split(",")})
+
+    with ReadSessionLocal() as db:
+        report = evaluate(db, ks, args.test_fraction, cutoff, args.min_weight, weights)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        log.info("Report written to %s", args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Parameter sweep over blend weights and ranking settings.
+
+Trains the engine once on the time split used by app.evaluation.offline,
+scores every evaluated user with each scorer once, and shares those score
+arrays with a process pool that ranks and evaluates each grid point. Run
+with e.g.
+
+    python -m app.evaluation.sweep --alpha 0.4,0.6,0.8 --mmr-lambda 0.5,0.7,1.0 --candidates 100,200
+"""
+from __future__ import annotations
+import argparse, itertools, json, logging, os, time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import ReadSessionLocal
+from ..recommenders.base import TrainingData
+from ..recommenders.engine import ALPHA, Engine, POPULARITY_WEIGHT
+from ..recommenders.pool import Spec, pack_shared, unpack_shared
+from .metrics import ranking_metrics
+from .offline import SCORE_CHUNK, TimedActions, load_timed_actions, relevant_items, time_split
+
+log = logging.getLogger(__name__)
+
+
+def _floats(value: str) -> List[float]:
+    return [float(v) for v in value.split(",")]
+
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",")]
+
+
+# ---------- Score cache ----------
+def score_cache(engine: Engine, user_ids: np.ndarray, train: TimedActions) -> Dict[str, np.ndarray]:
+    """
+    Every scorer's (users × items) scores and candidate mask for the evaluated
+    users, plus which items each of them already acted on. Blending these is
+    all a grid point needs, so no scorer runs more than once.
+    """
+    shape = (len(user_ids), engine.n_items)
+    cache: Dict[str, np.ndarray] = {"hidden": np.zeros(shape, dtype=bool)}
+    for name in engine.scorers:
+        cache[f"scores.{name}"] = np.zeros(shape, dtype=np.float32)
+        cache[f"mask.{name}"] = np.zeros(shape, dtype=bool)
+
+    for start in range(0, len(user_ids), SCORE_CHUNK):
+        chunk = user_ids[start:start + SCORE_CHUNK]
+        sl = slice(start, start + len(chunk))
+        acts = train.take(np.isin(train.users, chunk))
+        rows = np.searchsorted(chunk, acts.users)  # user_ids are sorted
+        W = engine.user_matrix(rows, acts.tmdb, acts.weights, len(chunk))
+        for name, scorer in engine.scorers.items():
+            scores, mask = scorer.score(W)
+            cache[f"scores.{name}"][sl] = scores
+            cache[f"mask.{name}"][sl] = mask
+
+        seen = np.zeros((len(chunk), engine.n_items), dtype=np.float32)
+        engine.hide_seen(seen, rows, acts.tmdb)
+        cache["hidden"][sl] = np.isinf(seen)
+    return cache
+
+
+# ---------- Worker side ----------
+_worker_shm: Optional[SharedMemory] = None
+_worker_state: Dict[str, Any] = {}
+
+
+def _init_worker(shm_name: str, spec: Spec, ks: Sequence[int]) -> None:
+    global _worker_shm
+    _worker_shm = SharedMemory(name=shm_name)
+    arrays = unpack_shared(_worker_shm.buf, spec)
+    engine_arrays = {k[len("engine."):]: v for k, v in arrays.items() if k.startswith("engine.")}
+    _worker_state.update(
+        engine=Engine.from_shared(engine_arrays, {}),
+        arrays=arrays,
+        ks=list(ks),
+    )
+
+
+def _evaluate_point(point: Dict[str, float]) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    engine: Engine = _worker_state["engine"]
+    arrays = _worker_state["arrays"]
+    ks = _worker_state["ks"]
+    weights = {"cf": point["alpha"], "content": 1.0 - point["alpha"], "popularity": point["popularity"]}
+
+    hidden = arrays["hidden"]
+    blended = np.zeros(hidden.shape, dtype=np.float32)
+    candidate = np.zeros(hidden.shape, dtype=bool)
+    for name, weight in weights.items():
+        if weight == 0:
+            continue
+        blended += weight * arrays[f"scores.{name}"]
+        candidate |= arrays[f"mask.{name}"]
+    blended[~candidate | hidden] = -np.inf
+
+    n = max(ks)
+    recs = np.full((hidden.shape[0], n), -1, dtype=np.int64)
+    for r in range(hidden.shape[0]):
+        rows, _scores = engine.top_n(
+            blended[r], n, candidates=int(point["candidates"]), mmr_lambda=point["mmr_lambda"],
+        )
+        recs[r, :len(rows)] = rows
+
+    result: Dict[str, Any] = dict(point)
+    result.update(ranking_metrics(recs, arrays["relevant"], ks, engine.n_items))
+    result["eval_s"] = time.perf_counter() - t0
+    return result
+
+
+# ---------- Driver ----------
+def sweep(
+    db: Session,
+    grid: Dict[str, Sequence[float]],
+    ks: Sequence[int] = (10,),
+    test_fraction: float = 0.2,
+    min_weight: float = 0.4,
+    max_users: int = 5000,
+    workers: Optional[int] = None,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    train, test, _cutoff = time_split(load_timed_actions(db), test_fraction)
+
+    t0 = time.perf_counter()
+    engine = Engine(TrainingData.from_db(db, train.acts))
+    log.info("Trained in %.1fs", time.perf_counter() - t0)
+
+    user_ids, relevant = relevant_items(engine, train, test, min_weight)
+    if len(user_ids) > max_users:
+        keep = np.sort(np.random.default_rng(seed).choice(len(user_ids), max_users, replace=False))
+        user_ids, relevant = user_ids[keep], relevant[keep]
+
+    t0 = time.perf_counter()
+    arrays: Dict[str, Any] = {f"engine.{k}": v for k, v in engine.shared_arrays().items()}
+    arrays.update(score_cache(engine, user_ids, train))
+    arrays["relevant"] = relevant
+    shm, spec = pack_shared(arrays)
+    del arrays
+    log.info("Scored %d users in %.1fs, %.1f MiB shared", len(user_ids), time.perf_counter() - t0, shm.size / 2**20)
+
+    points = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(shm.name, spec, list(ks)),
+        ) as executor:
+            results = list(executor.map(_evaluate_point, points))
+    finally:
+        shm.close()
+        shm.unlink()
+    return results
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-8s %(message)s")
+    ap = argparse.ArgumentParser(description="Grid search over blend and ranking settings on one trained engine")
+    ap.add_argument("--alpha", type=_floats, default=[ALPHA], help="comma-separated CF shares")
+    ap.add_argument("--popularity", type=_floats, default=[POPULARITY_WEIGHT])
+    ap.add_argument("--mmr-lambda", type=_floats, default=[settings.RECS_MMR_LAMBDA])
+    ap.add_argument("--candidates", type=_ints, default=[settings.RECS_CANDIDATES], help="candidate pool sizes")
+    ap.add_argument("--k", type=_ints, default=[10], help="comma-separated cutoffs")
+    ap.add_argument("--sort", help="metric to rank grid points by (default ndcg@<largest k>)")
+    ap.add_argument("--test-fraction", type=float, default=0.2)
+    ap.add_argument("--min-weight", type=float, default=0.4)
+    ap.add_argument("--max-users", type=int, default=5000, help="evaluate a random sample of at most this many users")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="also write all results to this file")
+    args = ap.parse_args()
+
+    grid = {
+        "alpha": args.alpha,
+        "popularity": args.popularity,
+        "mmr_lambda": args.mmr_lambda,
+        "candidates": args.candidates,
+    }
+    ks = sorted(set(args.k))
+    with ReadSessionLocal() as db:
+        results = sweep(db, grid, ks, args.test_fraction, args.min_weight, args.max_users, args.workers, args.seed)
+
+    key = args.sort or f"ndcg@{ks[-1]}"
+    results.sort(key=lambda r: r[key], reverse=True)
+    columns = list(grid) + [k for k in results[0] if k not in grid]
+    print("  ".join(f"{c:>12}" for c in columns))
+    for r in results:
+        print("  ".join(f"{r[c]:>12.4f}" if isinstance(r[c], float) else f"{r[c]:>12}" for c in columns))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        log.info("Results written to %s", args.json)
+
+
+if __name__ == "__main__":
+    main()
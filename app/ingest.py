@@ -0,0 +1,153 @@
+"""Write-behind buffering for user action ingestion."""
+from __future__ import annotations
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from . import crud, schemas
+from .config import settings
+from .database import SessionLocal
+from .rec_cache import ranked_cache
+
+log = logging.getLogger(__name__)
+
+ActionKey = Tuple[int, int, str]  # (user_id, tmdb_movie_id, action_type)
+
+# errors caused by the rows themselves; anything else (lost connection, DB
+# down) is treated as transient and the whole batch is retried later
+ROW_ERRORS = (DataError, IntegrityError)
+
+
+class ActionBufferFull(Exception):
+    """The buffer already holds max_pending actions; the caller should back off."""
+
+
+class ActionBuffer:
+    """
+    Validated actions are queued here and acknowledged right away; a
+    background thread upserts them in batches. Repeated actions on the same
+    (user, movie, action_type) collapse to the latest one before writing.
+    At most `max_pending` actions are held, so a database outage cannot grow
+    the queue without bound.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_batch: int,
+        flush_interval: float,
+        max_pending: int,
+    ) -> None:
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: Dict[ActionKey, Dict] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def enqueue(self, user_id: int, actions: Iterable[schemas.UserActionCreate]) -> int:
+        """Queues the actions; raises ActionBufferFull (queueing none of them) if they do not fit."""
+        actions = list(actions)
+        n = 0
+        with self._lock:
+            if len(self._pending) + len(actions) > self.max_pending:
+                raise ActionBufferFull()
+            for a in actions:
+                key = (user_id, a.tmdb_movie_id, a.action_type)
+                self._pending.pop(key, None)  # re-append so flush order follows arrival
+                self._pending[key] = {
+                    "user_id": user_id,
+                    "tmdb_movie_id": a.tmdb_movie_id,
+                    "action_type": a.action_type,
+                    "rating": a.rating,
+                }
+                n += 1
+            full = len(self._pending) >= self.max_batch
+        if full:
+            self._wakeup.set()
+        return n
+
+    def flush(self) -> int:
+        """Writes everything queued so far; returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+
+            rows = list(batch.values())
+            try:
+                written = self._write_isolating(rows)
+            except Exception:
+                log.exception("action flush failed, requeueing %d rows", len(rows))
+                with self._lock:
+                    # keep anything newer that arrived during the failed flush
+                    batch.update(self._pending)
+                    self._pending = batch
+                return 0
+
+            for user_id in {r["user_id"] for r in written}:
+                ranked_cache.invalidate(user_id)
+            return len(written)
+
+    def _write(self, rows: List[Dict]) -> None:
+        with self.session_factory() as db:
+            for start in range(0, len(rows), self.max_batch):
+                crud.upsert_user_actions(db, rows[start:start + self.max_batch])
+            db.commit()
+
+    def _write_isolating(self, rows: List[Dict]) -> List[Dict]:
+        """
+        Writes the rows; if the database rejects some of them, bisects down to
+        the offending rows and drops those (logged) so they cannot hold back
+        everyone else's writes. Returns the rows written.
+        """
+        try:
+            self._write(rows)
+            return rows
+        except ROW_ERRORS as exc:
+            if len(rows) == 1:
+                log.error("dropping action rejected by the database: %s (%s)", rows[0], exc.orig)
+                return []
+        mid = len(rows) // 2
+        return self._write_isolating(rows[:mid]) + self._write_isolating(rows[mid:])
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="action-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+action_buffer = ActionBuffer(
+    SessionLocal,
+    max_batch=settings.ACTIONS_FLUSH_BATCH,
+    flush_interval=settings.ACTIONS_FLUSH_INTERVAL,
+    max_pending=settings.ACTIONS_BUFFER_MAX,
+)
@@ -0,0 +1,92 @@
+"""Vectorized construction of the user × item interaction matrix."""
+from __future__ import annotations
+from typing import Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import UserMovieAction
+
+
+def action_weights(action_types: np.ndarray, ratings: np.ndarray) -> np.ndarray:
+    """Signal strength per action row: action_type weight × normalized rating."""
+    types = np.asarray(action_types, dtype=object)
+    w = np.ones(len(types), dtype=np.float32)
+    for name, weight in settings.ACTION_WEIGHTS.items():
+        w[types == name] = weight
+
+    r = np.asarray(ratings, dtype=np.float32)  # None → nan
+    rated = ~np.isnan(r)
+    span = max(settings.RATING_MAX - settings.RATING_MIN, 1)
+    w[rated] *= np.clip((r[rated] - settings.RATING_MIN) / span, 0.0, 1.0)
+    return w
+
+
+def load_actions(
+    db: Session,
+    user_id: Optional[int] = None,
+    user_ids: Optional[Sequence[int]] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns (user_ids, tmdb_ids, weights) column arrays for all, one or some users' actions."""
+    q = db.query(
+        UserMovieAction.user_id,
+        UserMovieAction.tmdb_movie_id,
+        UserMovieAction.action_type,
+        UserMovieAction.rating,
+    )
+    if user_id is not None:
+        q = q.filter(UserMovieAction.user_id == user_id)
+    if user_ids is not None:
+        q = q.filter(UserMovieAction.user_id.in_(list(user_ids)))
+    rows = q.all()
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, np.empty(0, dtype=np.float32)
+
+    users, tmdb_ids, types, ratings = zip(*rows)
+    return (
+        np.asarray(users, dtype=np.int64),
+        np.asarray(tmdb_ids, dtype=np.int64),
+        action_weights(np.asarray(types, dtype=object), np.asarray(ratings, dtype=np.float32)),
+    )
+
+
+def item_columns(tmdb_ids: np.ndarray, movie_ids: np.ndarray, tv_ids: np.ndarray) -> np.ndarray:
+    """
+    Map tmdb ids onto the item axis [sorted movie ids, then sorted tv ids].
+    A movie wins over a TV show with the same id; unknown ids map to -1.
+    """
+    cols = np.full(len(tmdb_ids), -1, dtype=np.int64)
+    for offset, ids in ((len(movie_ids), tv_ids), (0, movie_ids)):
+        if len(ids) == 0:
+            continue
+        pos = np.minimum(np.searchsorted(ids, tmdb_ids), len(ids) - 1)
+        hit = ids[pos] == tmdb_ids
+        cols[hit] = offset + pos[hit]
+    return cols
+
+
+def build_interactions(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    weights: np.ndarray,
+    shape: Tuple[int, int],
+) -> sparse.csr_matrix:
+    """
+    CSR matrix with one cell per (row, col): duplicates across action types
+    collapse to their strongest weight instead of being summed.
+    """
+    keep = (cols >= 0) & (weights > 0)
+    rows, cols, weights = rows[keep], cols[keep], weights[keep]
+    if len(rows) == 0:
+        return sparse.csr_matrix(shape, dtype=np.float32)
+
+    order = np.lexsort((cols, rows))
+    rows, cols, weights = rows[order], cols[order], weights[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+    starts = np.flatnonzero(first)
+
+    data = np.maximum.reduceat(weights, starts)
+    return sparse.csr_matrix((data, (rows[starts], cols[starts])), shape=shape, dtype=np.float32)
@@ -1,11 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
-from .database import engine, Base, SessionLocal
-from .routers import actions, recommendations, auth   # ← добавили auth
-from .recommenders.hybrid import get_recommender, _meta_key
-
-Base.metadata.create_all(bind=engine)
+from .database import ReadSessionLocal, init_db
+from .routers import actions, recommendations, auth, health, metrics   # ← добавили auth
+from . import ranking
+from .config import settings
+from .ingest import action_buffer
+from .utils.crypto import hash_executor
+from .utils.google_auth import google_key_source
 
 app = FastAPI(title="Movie Recommender API", version="1.0.0")
 
@@ -16,13 +19,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+# compress larger bodies (JSON or MessagePack) for clients sending Accept-Encoding: gzip
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_SIZE)
+
+@app.on_event("startup")
+def create_tables():
+    if settings.DB_CREATE_ALL:
+        init_db()
 
+# models train in the background; /health/ready reports when they are done
 @app.on_event("startup")
 def warmup():
-    with SessionLocal() as db:
-        get_recommender(db, _meta_key())
+    ranking.start_warmup(ReadSessionLocal, settings.WARMUP_RETRY_INTERVAL)
+
+@app.on_event("startup")
+def start_action_buffer():
+    if settings.ACTIONS_WRITE_BEHIND:
+        action_buffer.start()
+
+@app.on_event("shutdown")
+def stop_action_buffer():
+    action_buffer.stop()
+
+@app.on_event("shutdown")
+def stop_warmup():
+    ranking.stop_warmup()
+
+@app.on_event("shutdown")
+async def close_google_client():
+    await google_key_source.aclose()
+
+@app.on_event("shutdown")
+def stop_hash_executor():
+    hash_executor.shutdown()
+
+@app.on_event("shutdown")
+def stop_scoring_pool():
+    ranking.shutdown_scoring_pool()
 
+app.include_router(health.router)
 app.include_router(auth.router)
 app.include_router(actions.router)
 app.include_router(recommendations.router)
+app.include_router(metrics.router)
@@ -1,7 +1,7 @@
 # app/models.py
 from sqlalchemy import (
     Column, Integer, String, SmallInteger, TIMESTAMP, ForeignKey,
-    ForeignKeyConstraint, Date, Text, func
+    ForeignKeyConstraint, UniqueConstraint, Index, Date, Text, func
 )
 from sqlalchemy.orm import relationship
 from .database import Base
@@ -67,6 +67,13 @@ class UserMovieAction(Base):
             ["movies.tmdb_movie_id"],
             ondelete="CASCADE"
         ),
+        UniqueConstraint(
+            "user_id", "tmdb_movie_id", "action_type",
+            name="uq_user_movie_action",
+        ),
+        # keyset-paginated listing: WHERE user_id [AND action_type] ORDER BY created_at, id
+        Index("ix_user_movie_actions_user_type_created", "user_id", "action_type", "created_at"),
+        Index("ix_user_movie_actions_user_created", "user_id", "created_at", "id"),
     )
 
     user  = relationship("User", back_populates="actions")
@@ -0,0 +1,198 @@
+"""
+Hybrid ranking pipeline behind /recommendations.
+
+The engine, scoring pool and their NumPy/SciPy/scikit-learn dependencies are
+imported on first use, so importing the API does not pay for them.
+"""
+from __future__ import annotations
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Sequence, Tuple, Type
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .sessions import session_buffer
+
+if TYPE_CHECKING:
+    from .catalog import CatalogMeta
+    from .recommenders.engine import Engine, Ranked
+    from .recommenders.neighbors import ItemNeighbors
+    from .recommenders.pool import ScoringPool
+
+log = logging.getLogger(__name__)
+
+ItemKey = Tuple[str, int]
+
+# users scored together per sparse matrix–matrix product
+BATCH_CHUNK = 256
+
+scoring_pool: "ScoringPool | None" = None
+_pool_lock = threading.Lock()
+
+_ready = threading.Event()
+_stop_warmup = threading.Event()
+
+
+def _engine_cls() -> "Type[Engine]":
+    from .recommenders.engine import Engine
+    return Engine
+
+
+def _scoring_pool() -> "ScoringPool | None":
+    global scoring_pool
+    if settings.SCORING_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if scoring_pool is None:
+            from .recommenders.pool import ScoringPool
+            scoring_pool = ScoringPool(settings.SCORING_WORKERS)
+        return scoring_pool
+
+
+def shutdown_scoring_pool() -> None:
+    if scoring_pool is not None:
+        scoring_pool.shutdown()
+
+
+def model_generation() -> int:
+    return _engine_cls().generation
+
+
+def reset_models() -> None:
+    _engine_cls().reset_cache()
+
+
+def item_neighbors(db: Session) -> "ItemNeighbors":
+    """Top-K hybrid neighbor lists, built in the engine's training pass."""
+    return _engine_cls().get_cached(db).neighbors
+
+
+def catalog_meta(db: Session) -> "CatalogMeta":
+    """Catalog metadata loaded with (and refreshed alongside) the engine."""
+    return _engine_cls().get_cached(db).catalog
+
+
+# ---------- Warmup ----------
+def is_ready() -> bool:
+    """True once the first engine build has finished."""
+    return _ready.is_set()
+
+
+def start_warmup(session_factory: Callable[[], Session], retry_interval: float) -> threading.Thread:
+    """Build the engine on a background thread, retrying until it succeeds or stop_warmup() is called."""
+    def _run():
+        while not _stop_warmup.is_set():
+            try:
+                with session_factory() as db:
+                    _engine_cls().get_cached(db)
+            except Exception:
+                log.exception("Engine warmup failed; retrying in %.0fs", retry_interval)
+                _stop_warmup.wait(retry_interval)
+                continue
+            _ready.set()
+            log.info("Engine warm, generation %d", model_generation())
+            return
+
+    thread = threading.Thread(target=_run, name="engine-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def stop_warmup() -> None:
+    _stop_warmup.set()
+
+
+def _score(engine: "Engine", user_ids, acts, n: int, boost=None) -> "Iterator[Ranked]":
+    """Runs Engine.rank in the scoring pool when one is configured, else inline."""
+    pool = _scoring_pool()
+    if pool is None:
+        return engine.rank(user_ids, acts, n, boost)
+    return iter(_pool_result(pool.submit(engine, user_ids, acts, n, boost), engine, user_ids, acts, n, boost))
+
+
+def _pool_result(future, engine: "Engine", user_ids, acts, n: int, boost=None) -> "List[Ranked]":
+    """The future's result; if a worker died, this call is scored inline (the pool rebuilds itself)."""
+    from concurrent.futures.process import BrokenProcessPool
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        log.warning("scoring worker died, ranking %d users inline", len(user_ids))
+        return list(engine.rank(user_ids, acts, n, boost))
+
+
+def _session_boost(engine: "Engine", user_id: int):
+    """SESSION_WEIGHT × the user's recent-action scores, or None without a session."""
+    import numpy as np
+    events = session_buffer.recent(user_id)
+    if not events or settings.SESSION_WEIGHT <= 0:
+        return None
+    tmdb_ids, types, ratings, ts = zip(*events)
+    scores = engine.session_boost(
+        np.asarray(tmdb_ids, dtype=np.int64),
+        np.asarray(types, dtype=object),
+        np.asarray(ratings, dtype=np.float32),
+        np.asarray(ts, dtype=np.float64),
+        now=time.time(),
+    )
+    return settings.SESSION_WEIGHT * scores[None, :]
+
+
+def rank_for_user(
+    db: Session,
+    user_id: int,
+    actions_db: Optional[Session] = None,
+) -> List[Tuple[ItemKey, float]]:
+    """
+    Full ranked candidate list for a user: the MMR-diversified head
+    followed by the rest of the candidate pool in blended-score order.
+    The user's in-memory session, if any, boosts neighbors of what they
+    just acted on. The user's own actions are read from `actions_db` when
+    given (the primary, so a write made just before is already visible);
+    `db` may be a lagging replica.
+    """
+    from .interactions import load_actions
+    engine = _engine_cls().get_cached(db)
+    acts = load_actions(actions_db if actions_db is not None else db, user_id)
+    boost = _session_boost(engine, user_id)
+    _uid, rows, scores = next(_score(engine, [user_id], acts, settings.RECS_CANDIDATES, boost))
+    return engine.keys(rows, scores)
+
+
+def rank_for_users(
+    db: Session,
+    user_ids: Sequence[int],
+    n: int = 10,
+) -> Iterator[Tuple[int, List[Tuple[ItemKey, float]]]]:
+    """
+    Batch variant of rank_for_user for internal jobs. Actions for all users
+    are read in one query before returning; the iterator then scores users
+    BATCH_CHUNK at a time with sparse matrix–matrix products and needs no
+    database access, so it can be consumed after the session is closed.
+    """
+    import numpy as np
+    from .interactions import load_actions
+    engine = _engine_cls().get_cached(db)
+    pool = _scoring_pool()
+    user_ids = list(dict.fromkeys(user_ids))
+    acts = load_actions(db, user_ids=user_ids)
+
+    def _chunk_acts(chunk):
+        sel = np.isin(acts[0], chunk)
+        return tuple(a[sel] for a in acts)
+
+    chunks = [user_ids[i:i + BATCH_CHUNK] for i in range(0, len(user_ids), BATCH_CHUNK)]
+
+    def _iter():
+        if pool is None:
+            for chunk in chunks:
+                for uid, rows, scores in engine.rank(chunk, _chunk_acts(chunk), n):
+                    yield uid, engine.keys(rows, scores)
+            return
+        # fan chunks out across the workers, yield in request order
+        futures = [pool.submit(engine, c, _chunk_acts(c), n) for c in chunks]
+        for chunk, fut in zip(chunks, futures):
+            for uid, rows, scores in _pool_result(fut, engine, chunk, _chunk_acts(chunk), n):
+                yield uid, engine.keys(rows, scores)
+
+    return _iter()
@@ -0,0 +1,84 @@
+"""In-process cache of ranked recommendation lists, one entry per user."""
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+from .config import settings
+
+T = TypeVar("T")
+
+
+class RankedListCache(Generic[T]):
+    """
+    LRU + TTL cache of ranked lists. Entries are tagged with the model
+    generation they were computed from, so a retrain makes them stale, and
+    with a caller-supplied watermark of the data they were ranked from (e.g.
+    the user's action count and newest id): the cache lives in one process,
+    so a write handled by another worker only shows up as a changed
+    watermark.
+    Each entry can also hold up to `max_pages` encoded response pages for
+    its list (oldest evicted first); they are dropped together with it.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_pages: int = 8) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_pages = max_pages
+        self._data: "OrderedDict[Hashable, Tuple[int, Any, float, List[T], Dict[Hashable, bytes]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, generation: int, watermark: Any = None) -> Optional[List[T]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            gen, mark, stored_at, ranked, _pages = entry
+            if gen != generation or mark != watermark or time.monotonic() - stored_at > self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return ranked
+
+    def put(self, key: Hashable, generation: int, ranked: List[T], watermark: Any = None) -> None:
+        with self._lock:
+            self._data[key] = (generation, watermark, time.monotonic(), ranked, {})
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    # Pages belong to one ranked list: callers pass the list they got from get()
+    # or put(), and pages are only read from or attached to the entry still
+    # holding that very list, never to one re-ranked in the meantime.
+    def get_page(self, key: Hashable, ranked: List[T], page: Hashable) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[3] is not ranked:
+                return None
+            return entry[4].get(page)
+
+    def put_page(self, key: Hashable, ranked: List[T], page: Hashable, body: bytes) -> None:
+        """Attach an encoded page of `ranked` to the key's entry; no-op if the entry no longer holds that list."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[3] is not ranked:
+                return
+            pages = entry[4]
+            pages.pop(page, None)
+            pages[page] = body
+            while len(pages) > self.max_pages:
+                del pages[next(iter(pages))]
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+ranked_cache: RankedListCache = RankedListCache(
+    settings.RECS_CACHE_SIZE, settings.RECS_CACHE_TTL, settings.RECS_CACHE_PAGES,
+)
@@ -0,0 +1,144 @@
+"""Shared training data and the scorer interface of the recommendation engine."""
+from __future__ import annotations
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Tuple, Union
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from ..catalog import CatalogMeta
+from ..interactions import build_interactions, item_columns, load_actions
+from ..models import Movie, TvShow
+
+TEXT_FETCH_SIZE = 2000
+
+# catalog text, either in memory or as a callable that re-reads it on each pass
+TextSource = Union[Sequence[str], Callable[[], Iterable[str]]]
+
+
+def _stream_texts(db: Session, catalog: CatalogMeta) -> Iterator[str]:
+    """
+    Title + overview per catalog row, in catalog order, fetched from the DB
+    cursor in batches. Rows are matched to the catalog by tmdb id, since the
+    catalog was read in an earlier statement: items added since are skipped
+    and items deleted since get an empty text, so rows never shift.
+    """
+    sources = (
+        ("movie", Movie, Movie.tmdb_movie_id, Movie.title),
+        ("tv", TvShow, TvShow.tmdb_tv_id, TvShow.name),
+    )
+    for media_type, model, key, title in sources:
+        wanted = catalog.tmdb_id[catalog.media_type == media_type].tolist()
+        rows = (
+            db.query(key, title, model.overview)
+            .order_by(key)
+            .execution_options(yield_per=TEXT_FETCH_SIZE)
+        )
+        i = 0
+        for tmdb_id, name, overview in rows:
+            while i < len(wanted) and wanted[i] < tmdb_id:
+                yield ""
+                i += 1
+            if i < len(wanted) and wanted[i] == tmdb_id:
+                yield f"{name or ''}. {overview or ''}".strip()
+                i += 1
+        for _ in range(i, len(wanted)):
+            yield ""
+
+
+class TrainingData:
+    """
+    Everything the scorers train on, loaded from the database in one pass.
+    Items live on a single axis shared by all scorers: movies sorted by tmdb
+    id, then TV shows sorted by tmdb id (the CatalogMeta row order).
+    Catalog text is not held in memory when loaded from the database; it is
+    streamed from the cursor whenever a scorer iterates it.
+    """
+
+    def __init__(
+        self,
+        catalog: CatalogMeta,
+        texts: TextSource,
+        user_ids: np.ndarray,
+        interactions: sparse.csr_matrix,
+    ) -> None:
+        self.catalog = catalog
+        self._texts = texts
+        self.user_ids = user_ids
+        self.interactions = interactions  # users × items, weighted and deduplicated
+
+    @property
+    def movie_ids(self) -> np.ndarray:
+        return self.catalog.tmdb_id[self.catalog.media_type == "movie"]
+
+    @property
+    def tv_ids(self) -> np.ndarray:
+        return self.catalog.tmdb_id[self.catalog.media_type == "tv"]
+
+    def iter_texts(self) -> Iterator[str]:
+        """One text per catalog row, in catalog order."""
+        texts = self._texts() if callable(self._texts) else self._texts
+        return iter(texts)
+
+    @classmethod
+    def from_db(
+        cls,
+        db: Session,
+        actions: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None,
+    ) -> "TrainingData":
+        """Catalog from the database; interactions from `actions` (user, tmdb, weight columns) or all actions."""
+        movies = db.query(Movie.tmdb_movie_id, Movie.title, Movie.poster_path).order_by(Movie.tmdb_movie_id).all()
+        tvs    = db.query(TvShow.tmdb_tv_id, TvShow.name, TvShow.poster_path).order_by(TvShow.tmdb_tv_id).all()
+
+        catalog = CatalogMeta(
+            media_type=["movie"] * len(movies) + ["tv"] * len(tvs),
+            tmdb_id=[int(m[0]) for m in movies] + [int(t[0]) for t in tvs],
+            title=[m[1] for m in movies] + [t[1] for t in tvs],
+            poster_path=[m[2] for m in movies] + [t[2] for t in tvs],
+        )
+
+        if actions is None:
+            actions = load_actions(db)
+        return cls.from_actions(catalog, lambda: _stream_texts(db, catalog), *actions)
+
+    @classmethod
+    def from_actions(
+        cls,
+        catalog: CatalogMeta,
+        texts: TextSource,
+        act_users: np.ndarray,
+        act_tmdb: np.ndarray,
+        act_w: np.ndarray,
+    ) -> "TrainingData":
+        data = cls(catalog, texts, np.unique(act_users), sparse.csr_matrix((0, len(catalog)), dtype=np.float32))
+        data.interactions = build_interactions(
+            np.searchsorted(data.user_ids, act_users),
+            item_columns(act_tmdb, data.movie_ids, data.tv_ids),
+            act_w,
+            shape=(len(data.user_ids), len(catalog)),
+        )
+        return data
+
+
+class Scorer:
+    """
+    A pluggable scoring model. Trained once per generation from TrainingData,
+    then scores batches of users given their interaction rows on the item axis.
+    """
+
+    name: str = ""
+    # attributes score() reads; exported to scoring worker processes
+    shared_fields: Tuple[str, ...] = ()
+
+    def fit(self, data: TrainingData) -> None:
+        raise NotImplementedError
+
+    def attach(self) -> None:
+        """Called once shared_fields are set in another process (e.g. a scoring worker)."""
+
+    def score(self, W: sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        W is (n_users × n_items) interaction weights. Returns dense scores of the
+        same shape and a boolean mask (broadcastable to it) of the items this
+        scorer nominates as candidates.
+        """
+        raise NotImplementedError
@@ -1,43 +1,72 @@
 from __future__ import annotations
+from typing import Optional, Tuple
 import numpy as np
 from scipy import sparse
 from sklearn.preprocessing import normalize
-from sqlalchemy.orm import Session
-from typing import Dict
-from ..models import UserMovieAction, Movie
-
-class ItemItemCF:
-    def __init__(self, db: Session):
-        self._build(db)
-
-    def _build(self, db: Session):
-        actions = db.query(UserMovieAction).all()
-        items   = [m[0] for m in db.query(Movie.tmdb_movie_id).all()]
-        items   = sorted(set(items))
-        users   = sorted({a.user_id for a in actions})
-
-        self.user2idx = {u:i for i,u in enumerate(users)}
-        self.item2idx = {m:i for i,m in enumerate(items)}
-        self.idx2item = {i:m for m,i in self.item2idx.items()}
-
-        if not users or not items:
-            self.UI = sparse.csr_matrix((0,0)); self.item_sim = sparse.csr_matrix((0,0)); return
-
-        rows, cols, data = [], [], []
-        for a in actions:
-            if a.tmdb_movie_id not in self.item2idx: continue
-            rows.append(self.user2idx[a.user_id]); cols.append(self.item2idx[a.tmdb_movie_id])
-            data.append(float(a.rating or 1.0))
-
-        UI = sparse.csr_matrix((data,(rows,cols)), shape=(len(users), len(items)), dtype=np.float32)
-        self.UI = normalize(UI, norm="l2", axis=1, copy=False)
-        self.item_sim = (self.UI.T @ self.UI).tocsr()
-        self.item_sim.setdiag(0.0); self.item_sim.eliminate_zeros()
-
-    def score_for_user(self, user_id: int) -> Dict[int, float]:
-        if user_id not in self.user2idx or self.item_sim.shape[0] == 0: return {}
-        u = self.user2idx[user_id]
-        scores_vec = self.UI.getrow(u) @ self.item_sim
-        scores = np.asarray(scores_vec.todense()).ravel()
-        idxs = np.where(scores > 0)[0]
-        return { self.idx2item[i]: float(scores[i]) for i in idxs }
+
+from ..config import settings
+from .base import Scorer, TrainingData
+from .cf_shards import ShardedCF, open_or_write_shards, open_shards
+
+
+class ItemCFScorer(Scorer):
+    """
+    Item-based CF over the L2-normalized user × item matrix. With CF_SHARDS > 0
+    item_sim is never held in memory: it is written once, by whichever process
+    trains on the data first, as memory-mapped column block shards that every
+    other process opens, and scored scatter-gather, keeping each user's top
+    CF_SHARD_TOP_N items.
+    """
+
+    name = "cf"
+    # shard_path is the shard directory as UTF-8 bytes, so workers can map it
+    shared_fields = ("item_sim", "shard_path")
+
+    item_sim: Optional[sparse.csr_matrix] = None
+    shard_path: Optional[np.ndarray] = None
+    _sharded: Optional[ShardedCF] = None
+
+    def fit(self, data: TrainingData) -> None:
+        self.UI = normalize(data.interactions, norm="l2", axis=1)
+        norms = np.sqrt(np.asarray(self.UI.multiply(self.UI).sum(axis=0)).ravel())
+        self._inv_norms = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+
+        if settings.CF_SHARDS > 0:
+            # written once per interaction matrix; other workers open the same set.
+            # Mapped (and pinned) now, before a later retrain may prune it
+            self._sharded, path = open_or_write_shards(self.UI, settings.CF_SHARD_DIR, settings.CF_SHARDS)
+            self.shard_path = np.frombuffer(path.encode(), dtype=np.uint8)
+            return
+
+        item_sim = (self.UI.T @ self.UI).tocsr()
+        # drop self-similarity by subtracting the diagonal
+        self.item_sim = (item_sim - sparse.diags(item_sim.diagonal())).tocsr().astype(np.float32)
+        self.item_sim.eliminate_zeros()
+
+    def item_cosine_rows(self, start: int, stop: int) -> sparse.csr_matrix:
+        """
+        Rows [start, stop) of the item–item cosine similarity (item_sim rescaled
+        by item column norms). In sharded mode they are recomputed from the
+        interactions and include the diagonal.
+        """
+        if self.item_sim is not None:
+            rows = self.item_sim[start:stop]
+        else:
+            rows = self.UI[:, start:stop].T @ self.UI
+        inv = self._inv_norms
+        return (sparse.diags(inv[start:stop]) @ rows @ sparse.diags(inv)).tocsr().astype(np.float32)
+
+    def attach(self) -> None:
+        if self.item_sim is None and self.shard_path is not None and self._sharded is None:
+            self._sharded = open_shards(bytes(self.shard_path).decode())
+
+    def score(self, W: sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        self.attach()
+        if self._sharded is not None:
+            scores = self._sharded.scores(normalize(W, norm="l2", axis=1), settings.CF_SHARD_TOP_N)
+            return scores, scores > 0
+        if self.item_sim is None or self.item_sim.nnz == 0:
+            return np.zeros(W.shape, dtype=np.float32), np.zeros((W.shape[0], 1), dtype=bool)
+        scores = (normalize(W, norm="l2", axis=1) @ self.item_sim).toarray()
+        np.maximum(scores, 0.0, out=scores)
+        return scores, scores > 0
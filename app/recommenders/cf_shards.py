@@ -0,0 +1,227 @@
+"""
+Item-item CF similarity partitioned by item column blocks.
+
+Each shard holds item_sim[:, start:stop] as CSR arrays in .npy files, so it
+can be memory-mapped by any process that can see the directory (or served
+by another host through the ShardScorer protocol). Scoring scatters the
+normalized user rows to every shard, each returns its own top-N, and the
+partial lists are merged.
+
+Every process that maps a shard set holds a shared flock on its lock file;
+write_shards only prunes sets nobody holds. Engines go through
+open_or_write_shards: the first process to train on a given interaction
+matrix writes the set, every other one (uvicorn workers, other hosts on
+the same directory) opens it.
+"""
+from __future__ import annotations
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Optional, Protocol, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+
+MANIFEST = "manifest.json"
+LOCK = "in-use.lock"
+BUILD_LOCK = "build.lock"  # in the root; one writer at a time
+
+
+class ShardScorer(Protocol):
+    start: int
+    stop: int
+
+    def top_n(self, W: sparse.csr_matrix, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Per user row: up to n (global item index, score) pairs with score > 0, -1/0 padded."""
+        ...
+
+
+def pin(path: str) -> IO[bytes]:
+    """Shared lock on a shard set, held until the returned file is closed."""
+    f = open(os.path.join(path, LOCK), "rb")
+    fcntl.flock(f, fcntl.LOCK_SH)
+    return f
+
+
+def _prune(path: str) -> bool:
+    """Removes a shard set unless some process holds it (or it is still being written)."""
+    try:
+        f = open(os.path.join(path, LOCK), "rb")
+    except FileNotFoundError:
+        return False
+    with f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        shutil.rmtree(path, ignore_errors=True)
+    return True
+
+
+# ---------- Writing ----------
+def _block(UI: sparse.csr_matrix, UI_csc: sparse.csc_matrix, start: int, stop: int) -> sparse.csr_matrix:
+    """item_sim[:, start:stop] with the self-similarity cells dropped."""
+    coo = (UI.T @ UI_csc[:, start:stop]).tocoo()
+    keep = (coo.row != coo.col + start) & (coo.data != 0)
+    return sparse.csr_matrix(
+        (coo.data[keep].astype(np.float32), (coo.row[keep], coo.col[keep])),
+        shape=(UI.shape[1], stop - start),
+    )
+
+
+def fingerprint(UI: sparse.csr_matrix) -> str:
+    """Content hash of the interaction matrix a shard set is computed from."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(np.asarray(UI.shape, dtype=np.int64).tobytes())
+    for part in (UI.indptr, UI.indices, UI.data):
+        h.update(np.ascontiguousarray(part).tobytes())
+    return h.hexdigest()
+
+
+def write_shards(
+    UI: sparse.csr_matrix,
+    root: str,
+    n_shards: int,
+    keep: int = 3,
+    fp: Optional[str] = None,
+) -> str:
+    """
+    Computes item_sim = UIᵀ·UI one column block at a time (the full matrix is
+    never materialized) and writes the blocks under a new directory in
+    `root`. Older shard sets beyond the `keep` newest are removed unless a
+    process still holds them (see open_shards), whatever their age.
+    """
+    n_items = UI.shape[1]
+    bounds = np.linspace(0, n_items, max(n_shards, 1) + 1).astype(int)
+    out = os.path.join(root, f"{time.time_ns()}-{uuid.uuid4().hex[:8]}")  # names sort by age
+    os.makedirs(out)
+    open(os.path.join(out, LOCK), "wb").close()
+    writing = pin(out)
+
+    UI_csc = UI.tocsc()
+    shards = []
+    for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        block = _block(UI, UI_csc, int(start), int(stop))
+        path = f"shard-{i:03d}"
+        os.makedirs(os.path.join(out, path))
+        for part in ("data", "indices", "indptr"):
+            np.save(os.path.join(out, path, f"{part}.npy"), getattr(block, part))
+        shards.append({"path": path, "start": int(start), "stop": int(stop), "nnz": int(block.nnz)})
+
+    with open(os.path.join(out, MANIFEST), "w") as f:
+        json.dump({"n_items": n_items, "fingerprint": fp, "shards": shards}, f)
+
+    old = sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)))[:-keep]
+    for d in old:
+        _prune(os.path.join(root, d))
+    writing.close()
+    return out
+
+
+def find_shards(root: str, fp: str, n_shards: int) -> Optional[str]:
+    """Newest complete shard set under `root` computed from the matrix with fingerprint `fp`."""
+    try:
+        names = sorted(os.listdir(root), reverse=True)
+    except FileNotFoundError:
+        return None
+    for name in names:
+        try:
+            with open(os.path.join(root, name, MANIFEST)) as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, NotADirectoryError, ValueError):
+            continue
+        if manifest.get("fingerprint") == fp and len(manifest["shards"]) == max(n_shards, 1):
+            return os.path.join(root, name)
+    return None
+
+
+def open_or_write_shards(UI: sparse.csr_matrix, root: str, n_shards: int) -> Tuple["ShardedCF", str]:
+    """
+    Opens the shard set for UI if some process already wrote it, else writes
+    it. Builders serialize on a lock in `root`, so concurrent trainers on the
+    same data compute item_sim once and share one set on disk and in the
+    page cache.
+    """
+    fp = fingerprint(UI)
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, BUILD_LOCK), "a+b") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        path = find_shards(root, fp, n_shards)
+        if path is None:
+            path = write_shards(UI, root, n_shards, fp=fp)
+        # pinned before the build lock is released, so no writer can prune it first
+        return open_shards(path), path
+
+
+# ---------- Scoring ----------
+class MappedShard:
+    """One column block, memory-mapped read-only from disk."""
+
+    def __init__(self, path: str, n_items: int, start: int, stop: int) -> None:
+        self.start, self.stop = start, stop
+        data, indices, indptr = (
+            np.load(os.path.join(path, f"{part}.npy"), mmap_mode="r") for part in ("data", "indices", "indptr")
+        )
+        self.block = sparse.csr_matrix((data, indices, indptr), shape=(n_items, stop - start), copy=False)
+
+    def top_n(self, W: sparse.csr_matrix, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        scores = (W @ self.block).toarray()
+        k = min(n, scores.shape[1])
+        idx = np.full((W.shape[0], n), -1, dtype=np.int64)
+        top_scores = np.zeros((W.shape[0], n), dtype=np.float32)
+        if k == 0:
+            return idx, top_scores
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        s = np.take_along_axis(scores, top, axis=1)
+        idx[:, :k] = np.where(s > 0, top + self.start, -1)
+        top_scores[:, :k] = np.where(s > 0, s, 0.0)
+        return idx, top_scores
+
+
+def open_shards(path: str) -> "ShardedCF":
+    """Pins and maps a shard set written by write_shards; the pin lasts as long as the returned object."""
+    lock = pin(path)
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    n_items = manifest["n_items"]
+    shards = [
+        MappedShard(os.path.join(path, s["path"]), n_items, s["start"], s["stop"]) for s in manifest["shards"]
+    ]
+    return ShardedCF(n_items, shards, lock=lock)
+
+
+class ShardedCF:
+    """Scatter-gather over shard scorers; merges their partial top-N lists into dense score rows."""
+
+    def __init__(
+        self,
+        n_items: int,
+        shards: Sequence[ShardScorer],
+        threads: int = 4,
+        lock: Optional[IO[bytes]] = None,
+    ) -> None:
+        self.n_items = n_items
+        self.shards = list(shards)
+        self._lock = lock
+        self._executor = ThreadPoolExecutor(max_workers=max(1, min(threads, len(self.shards))))
+
+    def top_n(self, W: sparse.csr_matrix, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        parts = list(self._executor.map(lambda shard: shard.top_n(W, n), self.shards))
+        idx = np.concatenate([p[0] for p in parts], axis=1)
+        scores = np.concatenate([p[1] for p in parts], axis=1)
+        k = min(n, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        return np.take_along_axis(idx, top, axis=1), np.take_along_axis(scores, top, axis=1)
+
+    def scores(self, W: sparse.csr_matrix, n: int) -> np.ndarray:
+        """Dense (users × items) scores holding each user's merged top-n; zero elsewhere."""
+        idx, top = self.top_n(W, n)
+        out = np.zeros((W.shape[0], self.n_items), dtype=np.float32)
+        rows = np.broadcast_to(np.arange(W.shape[0])[:, None], idx.shape)
+        hit = idx >= 0
+        out[rows[hit], idx[hit]] = top[hit]
+        return out
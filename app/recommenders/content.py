@@ -1,42 +1,83 @@
 from __future__ import annotations
+from itertools import islice
+from typing import Iterator, List, Tuple
 import numpy as np
-import pandas as pd
-from sqlalchemy.orm import Session
-from typing import Dict
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
-from ..models import Movie, UserMovieAction
-
-class ContentBased:
-    def __init__(self, db: Session):
-        self._build(db)
-
-    def _build(self, db: Session):
-        movies = db.query(Movie).all()
-        self.df = pd.DataFrame({
-            "tmdb_id": [m.tmdb_movie_id for m in movies],
-            "title":   [m.title for m in movies],
-            "text":    [f"{m.title or ''}. {m.overview or ''}" for m in movies],
-        })
-        if self.df.empty:
-            self.mat = None; self.tmdb2idx = {}; return
-        vect = TfidfVectorizer(stop_words="english", ngram_range=(1,2), min_df=2, max_df=0.9)
-        self.mat = vect.fit_transform(self.df["text"])
-        self.tmdb2idx = {int(t): i for i, t in enumerate(self.df["tmdb_id"])}
-
-    def _user_profile(self, db: Session, user_id: int):
-        acts = db.query(UserMovieAction).filter(UserMovieAction.user_id == user_id).all()
-        idxs, weights = [], []
-        for a in acts:
-            i = self.tmdb2idx.get(a.tmdb_movie_id)
-            if i is not None:
-                idxs.append(i); weights.append(float(a.rating or 1.0))
-        if not idxs: return None
-        return np.average(self.mat[idxs], axis=0, weights=weights)
-
-    def score_for_user(self, db: Session, user_id: int) -> Dict[int, float]:
-        if not self.tmdb2idx or self.mat is None: return {}
-        prof = self._user_profile(db, user_id)
-        if prof is None: return {}
-        sims = linear_kernel(prof, self.mat).ravel()
-        return {int(self.df.loc[i,"tmdb_id"]): float(sims[i]) for i in range(len(sims))}
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer
+
+from ..config import settings
+from .base import Scorer, TrainingData
+
+STOP_WORDS = "english"
+NGRAM_RANGE = (1, 2)
+MIN_DF = 2
+MAX_DF = 0.9
+
+HASHING_CHUNK = 5000
+
+
+def _chunks(texts: Iterator[str], size: int) -> Iterator[List[str]]:
+    while True:
+        chunk = list(islice(texts, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _tfidf_matrix(texts: Iterator[str]) -> sparse.csr_matrix:
+    vectorizer = TfidfVectorizer(stop_words=STOP_WORDS, ngram_range=NGRAM_RANGE, min_df=MIN_DF, max_df=MAX_DF)
+    # only the catalog matrix is kept; the vocabulary is dropped with the vectorizer
+    return vectorizer.fit_transform(texts)
+
+
+def _hashing_matrix(texts: Iterator[str], n_features: int) -> sparse.csr_matrix:
+    """
+    Term counts hashed into a fixed number of columns, chunk by chunk, then
+    the same df pruning and IDF weighting as the TF-IDF path.
+    """
+    hasher = HashingVectorizer(
+        stop_words=STOP_WORDS,
+        ngram_range=NGRAM_RANGE,
+        n_features=n_features,
+        alternate_sign=False,
+        norm=None,
+    )
+    counts = sparse.vstack(
+        [hasher.transform(chunk).astype(np.float32) for chunk in _chunks(texts, HASHING_CHUNK)],
+        format="csr",
+    )
+    df = np.bincount(counts.indices, minlength=n_features)
+    keep = (df >= MIN_DF) & (df <= MAX_DF * counts.shape[0])
+    counts = (counts @ sparse.diags(keep.astype(np.float32))).tocsr()
+    counts.eliminate_zeros()
+    return TfidfTransformer().fit_transform(counts)
+
+
+class ContentScorer(Scorer):
+    """TF-IDF over title + overview; users are the weighted mean of their items."""
+
+    name = "content"
+    shared_fields = ("mat",)
+
+    def fit(self, data: TrainingData) -> None:
+        self.mat = None
+        if not len(data.catalog):
+            return
+        if settings.CONTENT_VECTORIZER == "hashing":
+            mat = _hashing_matrix(data.iter_texts(), settings.CONTENT_HASH_FEATURES)
+        else:
+            mat = _tfidf_matrix(data.iter_texts())
+        self.mat = mat.astype(np.float32)
+
+    def embeddings(self, rows: np.ndarray) -> sparse.csr_matrix:
+        return self.mat[rows]
+
+    def score(self, W: sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        if self.mat is None:
+            return np.zeros(W.shape, dtype=np.float32), np.zeros((W.shape[0], 1), dtype=bool)
+        sums = np.asarray(W.sum(axis=1)).ravel()
+        inv = np.divide(1.0, sums, out=np.zeros_like(sums), where=sums > 0)
+        profiles = sparse.diags(inv) @ W @ self.mat
+        scores = (profiles @ self.mat.T).toarray().astype(np.float32)
+        # a user with a profile gets every item as a candidate
+        return scores, (sums > 0)[:, None]
@@ -0,0 +1,248 @@
+"""The recommendation engine: one training pass feeding pluggable scorers."""
+from __future__ import annotations
+import itertools
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Type
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..interactions import action_weights, build_interactions, item_columns
+from .base import Scorer, TrainingData
+from .cf import ItemCFScorer
+from .content import ContentScorer
+from .mmr import mmr_rerank
+from .neighbors import ItemNeighbors
+from .popularity import PopularityScorer
+from .session import session_scores
+
+ALPHA = 0.6
+POPULARITY_WEIGHT = 0.0
+
+NEIGHBORS_K = 50
+
+ItemKey = Tuple[str, int]
+Ranked = Tuple[int, np.ndarray, np.ndarray]  # (user_id, catalog rows, scores)
+
+SCORERS: Dict[str, Type[Scorer]] = {
+    ItemCFScorer.name: ItemCFScorer,
+    ContentScorer.name: ContentScorer,
+    PopularityScorer.name: PopularityScorer,
+}
+
+
+def default_weights() -> Dict[str, float]:
+    return {"cf": ALPHA, "content": 1.0 - ALPHA, "popularity": POPULARITY_WEIGHT}
+
+
+class Engine:
+    """
+    Trains every registered scorer from a single TrainingData load and blends
+    their scores with per-scorer weights. The content scorer also provides the
+    MMR embeddings, and content + CF together feed the neighbor lists.
+    """
+
+    _cached: "Engine | None" = None
+    _build_lock = threading.Lock()
+    generation = 0  # bumped on every reset; older cached rankings are stale
+    _serials = itertools.count()
+
+    @classmethod
+    def get_cached(cls, db: Session) -> "Engine":
+        engine = cls._cached
+        if engine is not None:
+            return engine
+        # one build at a time; concurrent callers wait and reuse its result
+        with cls._build_lock:
+            while True:
+                engine = cls._cached
+                if engine is not None:
+                    return engine
+                generation = cls.generation
+                engine = cls.from_db(db)
+                # a reset during the build means this data may predate it
+                if cls.generation == generation:
+                    cls._cached = engine
+                    return engine
+
+    @classmethod
+    def reset_cache(cls) -> None:
+        cls._cached = None
+        cls.generation += 1
+
+    @classmethod
+    def from_db(cls, db: Session, weights: Optional[Dict[str, float]] = None) -> "Engine":
+        return cls(TrainingData.from_db(db), weights)
+
+    def __init__(self, data: TrainingData, weights: Optional[Dict[str, float]] = None) -> None:
+        self.catalog = data.catalog
+        self.movie_ids = data.movie_ids
+        self.tv_ids = data.tv_ids
+        self.weights = default_weights() if weights is None else dict(weights)
+        self.serial = next(Engine._serials)  # build order, so older engines can be told apart
+
+        self.scorers: Dict[str, Scorer] = {}
+        for name, scorer_cls in SCORERS.items():
+            scorer = scorer_cls()
+            scorer.fit(data)
+            self.scorers[name] = scorer
+
+        self.content: ContentScorer = self.scorers["content"]
+        self.cf: ItemCFScorer = self.scorers["cf"]
+        self.neighbors = ItemNeighbors(
+            self.catalog, self.content.mat, self.cf.item_cosine_rows, alpha=ALPHA, k=NEIGHBORS_K,
+        )
+
+    @property
+    def n_items(self) -> int:
+        return len(self.movie_ids) + len(self.tv_ids)
+
+    def user_matrix(
+        self, rows: np.ndarray, act_tmdb: np.ndarray, act_w: np.ndarray, n_users: int,
+    ) -> sparse.csr_matrix:
+        """(n_users × n_items) interaction weights for live action rows."""
+        cols = item_columns(act_tmdb, self.movie_ids, self.tv_ids)
+        return build_interactions(rows, cols, act_w, shape=(n_users, self.n_items))
+
+    def blend(self, W: sparse.csr_matrix) -> np.ndarray:
+        """Weighted sum of scorer outputs; -inf where no scorer nominates the item."""
+        out = np.zeros(W.shape, dtype=np.float32)
+        candidate = np.zeros(W.shape, dtype=bool)
+        for name, weight in self.weights.items():
+            if weight == 0:
+                continue
+            scores, mask = self.scorers[name].score(W)
+            out += weight * scores
+            candidate |= mask
+        out[~candidate] = -np.inf
+        return out
+
+    def session_boost(
+        self,
+        act_tmdb: np.ndarray,
+        act_types: np.ndarray,
+        act_ratings: np.ndarray,
+        act_ts: np.ndarray,
+        now: float,
+    ) -> np.ndarray:
+        """
+        (n_items,) time-decayed neighbor scores for one user's recent actions.
+        Needs the neighbor lists, so it runs in the serving process.
+        """
+        return session_scores(
+            self.neighbors, self.movie_ids, self.tv_ids,
+            act_tmdb, action_weights(act_types, act_ratings), now - act_ts,
+            half_life=settings.SESSION_HALF_LIFE,
+        )
+
+    def hide_seen(self, blended: np.ndarray, rows: np.ndarray, act_tmdb: np.ndarray) -> None:
+        """Set -inf, in place, on everything each user row already acted on, matched by tmdb id."""
+        for offset, ids in ((0, self.movie_ids), (len(self.movie_ids), self.tv_ids)):
+            if len(ids) == 0:
+                continue
+            pos = np.minimum(np.searchsorted(ids, act_tmdb), len(ids) - 1)
+            hit = ids[pos] == act_tmdb
+            blended[rows[hit], offset + pos[hit]] = -np.inf
+
+    # ---------- Ranking ----------
+    def top_n(
+        self,
+        blended: np.ndarray,
+        n: int,
+        candidates: Optional[int] = None,
+        mmr_lambda: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-`n` of one user's blended score row: MMR head, then score order.
+        Candidate pool size and MMR lambda default to the settings.
+        """
+        candidates = settings.RECS_CANDIDATES if candidates is None else candidates
+        mmr_lambda = settings.RECS_MMR_LAMBDA if mmr_lambda is None else mmr_lambda
+        valid = np.flatnonzero(np.isfinite(blended))
+        if len(valid) == 0:
+            return valid, blended[valid]
+        pool = min(candidates, len(valid))
+        cand = valid[np.argpartition(-blended[valid], pool - 1)[:pool]]
+        cand = cand[np.argsort(-blended[cand], kind="stable")]
+
+        if self.content.mat is not None and len(cand) >= 2:
+            head = cand[mmr_rerank(self.content.embeddings(cand), lambda_=mmr_lambda, k=settings.RECS_MMR_K)]
+        else:
+            head = cand[:settings.RECS_MMR_K]
+        ordered = np.concatenate([head, cand[~np.isin(cand, head)]])[:n]
+        return ordered, blended[ordered]
+
+    def rank(
+        self,
+        user_ids: Sequence[int],
+        acts: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        n: int,
+        boost: Optional[np.ndarray] = None,
+    ) -> Iterator[Ranked]:
+        """
+        Scores a chunk of users together; yields (user_id, rows, scores) per user.
+        `boost` (users × items, or broadcastable) is added to the blend, and
+        items it scores above zero become candidates.
+        """
+        act_users, act_tmdb, act_w = acts
+        user_ids = list(user_ids)
+
+        # matrix row of each action's user
+        order = np.asarray(user_ids, dtype=np.int64)
+        sorter = np.argsort(order)
+        rows = sorter[np.searchsorted(order, act_users, sorter=sorter)]
+
+        blended = self.blend(self.user_matrix(rows, act_tmdb, act_w, len(user_ids)))
+        if boost is not None:
+            finite = np.isfinite(blended)
+            blended = np.where(
+                finite | (boost > 0), np.where(finite, blended, 0.0) + boost, -np.inf,
+            ).astype(np.float32)
+        self.hide_seen(blended, rows, act_tmdb)
+
+        for r, uid in enumerate(user_ids):
+            yield (uid, *self.top_n(blended[r], n))
+
+    def keys(self, rows: np.ndarray, scores: np.ndarray) -> List[Tuple[ItemKey, float]]:
+        return [
+            ((self.catalog.media_type[i], int(self.catalog.tmdb_id[i])), float(s))
+            for i, s in zip(rows, scores)
+        ]
+
+    # ---------- Sharing with scoring workers ----------
+    def shared_arrays(self) -> Dict[str, Any]:
+        """Every array scoring needs (not metadata or neighbors), by name."""
+        arrays: Dict[str, Any] = {"movie_ids": self.movie_ids, "tv_ids": self.tv_ids}
+        for name, scorer in self.scorers.items():
+            for field in scorer.shared_fields:
+                arrays[f"{name}.{field}"] = getattr(scorer, field)
+        return arrays
+
+    def bind_shared(self, arrays: Dict[str, Any]) -> None:
+        """Replaces the scoring arrays with equal ones (e.g. views of a shared block)."""
+        self.movie_ids = arrays["movie_ids"]
+        self.tv_ids = arrays["tv_ids"]
+        for name, scorer in self.scorers.items():
+            for field in scorer.shared_fields:
+                setattr(scorer, field, arrays.get(f"{name}.{field}"))
+
+    @classmethod
+    def from_shared(cls, arrays: Dict[str, Any], weights: Dict[str, float]) -> "Engine":
+        """Scoring-only engine over arrays exported by shared_arrays()."""
+        engine = cls.__new__(cls)
+        engine.catalog = None
+        engine.neighbors = None
+        engine.movie_ids = arrays["movie_ids"]
+        engine.tv_ids = arrays["tv_ids"]
+        engine.weights = dict(weights)
+        engine.scorers = {}
+        for name, scorer_cls in SCORERS.items():
+            scorer = scorer_cls()
+            for field in scorer.shared_fields:
+                setattr(scorer, field, arrays.get(f"{name}.{field}"))
+            scorer.attach()
+            engine.scorers[name] = scorer
+        engine.content = engine.scorers["content"]
+        engine.cf = engine.scorers["cf"]
+        return engine
@@ -0,0 +1,43 @@
+from __future__ import annotations
+from typing import List, Union
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+
+# ---------- MMR (Maximal Marginal Relevance) ----------
+def mmr_rerank(
+    X: Union[np.ndarray, sparse.spmatrix],
+    lambda_: float = 0.7,
+    k: int = 30,
+) -> List[int]:
+    """
+    Diversify candidates given in relevance order (one embedding row each);
+    returns the selected row positions. Sparse rows are compared without
+    densifying them.
+    """
+    n = X.shape[0]
+    if n <= 1:
+        return list(range(min(n, k)))
+
+    if sparse.issparse(X):
+        X_norm = normalize(X)
+        sim = (X_norm @ X_norm.T).toarray()  # (n x n), diag ~ 1
+    else:
+        X_norm = X / (np.linalg.norm(X, axis=1, keepdims=True) + 1e-8)
+        sim = X_norm @ X_norm.T
+
+    rel = -np.arange(n, dtype=np.float64)
+    max_sim = sim[0].copy()
+    remaining = np.ones(n, dtype=bool)
+    remaining[0] = False
+    selected: List[int] = [0]
+
+    while remaining.any() and len(selected) < k:
+        val = np.where(remaining, lambda_ * rel - (1.0 - lambda_) * max_sim, -np.inf)
+        best = int(np.argmax(val))
+        selected.append(best)
+        remaining[best] = False
+        np.maximum(max_sim, sim[best], out=max_sim)
+
+    return selected
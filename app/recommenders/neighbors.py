@@ -0,0 +1,61 @@
+"""Precomputed top-K "more like this" neighbor lists."""
+from __future__ import annotations
+from typing import Callable, List, Optional, Tuple
+import numpy as np
+from scipy import sparse
+
+from ..catalog import CatalogMeta
+
+ItemKey = Tuple[str, int]
+
+_CHUNK = 256
+
+
+class ItemNeighbors:
+    """
+    Top-K hybrid (CF + content) neighbors for every catalog row, stored as
+    (n_items, K) index/score arrays so a lookup is a single row slice.
+    """
+
+    def __init__(
+        self,
+        catalog: CatalogMeta,
+        content_mat: Optional[sparse.csr_matrix],
+        cf_rows: Callable[[int, int], sparse.spmatrix],
+        alpha: float,
+        k: int = 50,
+    ) -> None:
+        self.catalog = catalog
+        n = len(catalog)
+        k = max(min(k, n - 1), 0)
+        self.idx = np.full((n, k), -1, dtype=np.int32)
+        self.score = np.zeros((n, k), dtype=np.float32)
+        if k == 0 or content_mat is None:
+            return
+
+        mat_t = content_mat.T.tocsc()
+        for start in range(0, n, _CHUNK):
+            stop = min(start + _CHUNK, n)
+            sim = (1.0 - alpha) * (content_mat[start:stop] @ mat_t).toarray()
+            sim += alpha * cf_rows(start, stop).toarray()
+            sim[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+            top = np.argpartition(-sim, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(sim, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+            self.idx[start:stop] = np.where(top_scores > 0, top, -1)
+            self.score[start:stop] = np.where(top_scores > 0, top_scores, 0.0)
+
+    def similar(self, key: ItemKey, n: int = 10) -> List[Tuple[ItemKey, float]]:
+        row = self.catalog.key2row.get(key)
+        if row is None:
+            return []
+        out: List[Tuple[ItemKey, float]] = []
+        for j, s in zip(self.idx[row, :n], self.score[row, :n]):
+            if j < 0:
+                break
+            out.append(((self.catalog.media_type[j], int(self.catalog.tmdb_id[j])), float(s)))
+        return out
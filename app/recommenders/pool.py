@@ -0,0 +1,215 @@
+"""
+Optional process pool for CPU-bound scoring. The engine's matrices are
+copied once per model generation into a shared memory block; worker
+processes map them read-only, so scoring scales with cores instead of
+serializing on the GIL of a single uvicorn worker.
+"""
+from __future__ import annotations
+import logging
+import multiprocessing as mp
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+
+from .engine import Engine, Ranked
+
+log = logging.getLogger(__name__)
+
+_ALIGN = 64
+
+# name -> ("dense", offset, shape, dtype) | ("csr", shape, {part: (offset, shape, dtype)}) | ("none",)
+Spec = Dict[str, Tuple]
+
+
+# ---------- Shared memory packing ----------
+def _layout(arrays: Dict[str, Any]) -> Tuple[Spec, List[Tuple[int, np.ndarray]], int]:
+    spec: Spec = {}
+    chunks: List[Tuple[int, np.ndarray]] = []
+    offset = 0
+
+    def place(arr: np.ndarray) -> Tuple[int, Tuple[int, ...], str]:
+        nonlocal offset
+        arr = np.ascontiguousarray(arr)
+        start = offset
+        chunks.append((start, arr))
+        offset = start + (arr.nbytes + _ALIGN - 1) // _ALIGN * _ALIGN
+        return start, arr.shape, arr.dtype.str
+
+    for name, value in arrays.items():
+        if value is None:
+            spec[name] = ("none",)
+        elif sparse.issparse(value):
+            csr = value.tocsr()
+            parts = {part: place(getattr(csr, part)) for part in ("data", "indices", "indptr")}
+            spec[name] = ("csr", csr.shape, parts)
+        else:
+            spec[name] = ("dense", *place(np.asarray(value)))
+    return spec, chunks, max(offset, 1)
+
+
+def _view(buf, offset: int, shape: Tuple[int, ...], dtype: str) -> np.ndarray:
+    arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=buf, offset=offset)
+    arr.flags.writeable = False
+    return arr
+
+
+def pack_shared(arrays: Dict[str, Any]) -> Tuple[SharedMemory, Spec]:
+    """Copy arrays (dense, CSR or None) into a new shared memory block; the caller unlinks it."""
+    spec, chunks, size = _layout(arrays)
+    shm = SharedMemory(create=True, size=size)
+    for offset, arr in chunks:
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf, offset=offset)[...] = arr
+    return shm, spec
+
+
+def map_shared(shm: SharedMemory, spec: Spec) -> Dict[str, Any]:
+    """
+    Like unpack_shared(), but through a mapping of its own (Linux /dev/shm),
+    so the views stay valid after `shm` is closed and unlinked.
+    """
+    buf = np.memmap(f"/dev/shm/{shm.name.lstrip('/')}", dtype=np.uint8, mode="r")
+    return unpack_shared(buf, spec)
+
+
+def unpack_shared(buf, spec: Spec) -> Dict[str, Any]:
+    """Read-only views over a block written by pack_shared()."""
+    out: Dict[str, Any] = {}
+    for name, entry in spec.items():
+        if entry[0] == "none":
+            out[name] = None
+        elif entry[0] == "csr":
+            _kind, shape, parts = entry
+            data, indices, indptr = (_view(buf, *parts[p]) for p in ("data", "indices", "indptr"))
+            out[name] = sparse.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+        else:
+            out[name] = _view(buf, *entry[1:])
+    return out
+
+
+# ---------- Worker side ----------
+_worker_shm: Optional[SharedMemory] = None
+_worker_engine: Optional[Engine] = None
+
+
+def _init_worker(shm_name: str, spec: Spec, weights: Dict[str, float]) -> None:
+    global _worker_shm, _worker_engine
+    # spawned workers share the parent's resource tracker, so attaching here
+    # does not hand ownership of the block to this process
+    _worker_shm = SharedMemory(name=shm_name)
+    _worker_engine = Engine.from_shared(unpack_shared(_worker_shm.buf, spec), weights)
+
+
+def _rank_in_worker(
+    user_ids: Sequence[int],
+    acts: Tuple[np.ndarray, np.ndarray, np.ndarray],
+    n: int,
+    boost: Optional[np.ndarray] = None,
+) -> List[Ranked]:
+    return list(_worker_engine.rank(user_ids, acts, n, boost))
+
+
+# ---------- Parent side ----------
+class ScoringPool:
+    """
+    Process pool bound to one engine generation. When the engine is retrained
+    a new pool and memory block are created; the old ones are retired in the
+    background once their in-flight work is done. Requests still holding an
+    older engine are scored in the calling thread instead of swapping the
+    pool back. A pool whose worker died (BrokenProcessPool) is retired and
+    rebuilt on the next submit.
+
+    Once packed, the engine's own scoring arrays are rebound to views of the
+    shared block, so the parent does not keep a second copy of the model.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._engine: Optional[Engine] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._shm: Optional[SharedMemory] = None
+        self._newest = -1  # serial of the newest engine seen, kept across retirements
+
+    def submit(
+        self,
+        engine: Engine,
+        user_ids: Sequence[int],
+        acts: Tuple[np.ndarray, np.ndarray, np.ndarray],
+        n: int,
+        boost: Optional[np.ndarray] = None,
+    ) -> "Future[List[Ranked]]":
+        # submit under the lock so no concurrent swap can shut the executor down in between
+        with self._lock:
+            executor = self._executor_for(engine)
+            if executor is not None:
+                try:
+                    future = executor.submit(_rank_in_worker, list(user_ids), acts, n, boost)
+                except BrokenProcessPool:
+                    log.warning("scoring pool broken, rebuilding")
+                    self._retire()
+                    executor = self._executor_for(engine)
+                    future = executor.submit(_rank_in_worker, list(user_ids), acts, n, boost)
+                future.add_done_callback(lambda f: self._check_broken(executor, f))
+                return future
+
+        future = Future()
+        try:
+            future.set_result(list(engine.rank(user_ids, acts, n, boost)))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def _check_broken(self, executor: ProcessPoolExecutor, future: "Future[List[Ranked]]") -> None:
+        """Retires the executor as soon as one of its futures reports a dead worker."""
+        if future.cancelled() or not isinstance(future.exception(), BrokenProcessPool):
+            return
+        with self._lock:
+            if self._executor is executor:
+                log.warning("scoring pool broken, retiring it")
+                self._retire()
+
+    def _executor_for(self, engine: Engine) -> Optional[ProcessPoolExecutor]:
+        """The executor for `engine`, built if it is the newest engine seen; None if it is older."""
+        if self._engine is not engine:
+            if engine.serial < self._newest:
+                return None
+            self._retire()
+            shm, spec = pack_shared(engine.shared_arrays())
+            engine.bind_shared(map_shared(shm, spec))
+            self._shm = shm
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=mp.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(shm.name, spec, engine.weights),
+            )
+            self._engine = engine
+            self._newest = engine.serial
+            log.info("scoring pool: %d workers, %.1f MiB shared", self.workers, shm.size / 2**20)
+        return self._executor
+
+    def _retire(self) -> None:
+        executor, shm = self._executor, self._shm
+        self._engine = self._executor = self._shm = None
+        if executor is None:
+            return
+
+        def _close():
+            executor.shutdown(wait=True)
+            shm.close()
+            shm.unlink()
+
+        threading.Thread(target=_close, name="scoring-pool-retire", daemon=True).start()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, shm = self._executor, self._shm
+            self._engine = self._executor = self._shm = None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,22 @@
+from __future__ import annotations
+from typing import Tuple
+import numpy as np
+from scipy import sparse
+
+from .base import Scorer, TrainingData
+
+
+class PopularityScorer(Scorer):
+    """Share of users with a positive interaction, scaled so the top item is 1."""
+
+    name = "popularity"
+    shared_fields = ("pop",)
+
+    def fit(self, data: TrainingData) -> None:
+        counts = np.asarray((data.interactions > 0).sum(axis=0), dtype=np.float32).ravel()
+        top = counts.max() if len(counts) else 0.0
+        self.pop = counts / top if top > 0 else counts
+
+    def score(self, W: sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        scores = np.broadcast_to(self.pop, W.shape).astype(np.float32)
+        return scores, (self.pop > 0)[None, :]
@@ -0,0 +1,39 @@
+"""Short-term session scores: recent actions spread over precomputed item neighbors."""
+from __future__ import annotations
+import numpy as np
+
+from ..interactions import item_columns
+from .neighbors import ItemNeighbors
+
+
+def session_scores(
+    neighbors: ItemNeighbors,
+    movie_ids: np.ndarray,
+    tv_ids: np.ndarray,
+    tmdb_ids: np.ndarray,
+    weights: np.ndarray,
+    ages: np.ndarray,
+    half_life: float,
+) -> np.ndarray:
+    """
+    (n_items,) scores from a handful of recent actions: each acted-on item
+    passes its action weight, decayed by 0.5 ** (age / half_life), to its
+    top-K neighbors in proportion to their similarity. Scaled so the best
+    item is 1; all zeros without usable events.
+    """
+    n_items, k = neighbors.idx.shape
+    out = np.zeros(n_items, dtype=np.float32)
+    rows = item_columns(tmdb_ids, movie_ids, tv_ids)
+    coef = weights * np.power(0.5, np.maximum(ages, 0.0) / half_life)
+    keep = (rows >= 0) & (coef > 0)
+    if k == 0 or not keep.any():
+        return out
+
+    idx = neighbors.idx[rows[keep]]
+    vals = neighbors.score[rows[keep]] * coef[keep, None].astype(np.float32)
+    hit = idx >= 0
+    np.add.at(out, idx[hit], vals[hit])
+    top = out.max()
+    if top > 0:
+        out /= top
+    return out
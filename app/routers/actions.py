@@ -1,13 +1,18 @@
+import base64
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, Response
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from .. import crud, schemas, models
 from ..database import get_db
 from ..config import settings
+from ..ingest import ActionBufferFull, action_buffer
+from ..rec_cache import ranked_cache
+from ..sessions import session_buffer
+from ..utils.encoding import NEGOTIATED_RESPONSES, encode, encoded_response, negotiate
 
 router = APIRouter(
     prefix="/user",
@@ -63,6 +68,9 @@ def add_action(
 
     # create-or-update to avoid UniqueViolation on repeated ratings
     db_act, created = crud.create_or_update_user_action(db, token_data.user_id, action)
+    # the session feeds the next /for-you ranking, which the invalidation forces
+    session_buffer.record(token_data.user_id, action.tmdb_movie_id, action.action_type, action.rating)
+    ranked_cache.invalidate(token_data.user_id)
 
     if not created:
         response.status_code = status.HTTP_200_OK
@@ -70,18 +78,113 @@ def add_action(
     return db_act
 
 
+@router.post(
+    "/actions/batch",
+    response_model=schemas.UserActionBatchResult,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def add_actions_batch(
+    batch: schemas.UserActionBatch,
+    response: Response,
+    token_data: schemas.TokenData = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Add many actions at once. With write-behind enabled they are queued and
+    acknowledged (202) and written in bulk shortly after; otherwise they are
+    upserted in a single statement before responding (200). A full write-behind
+    queue answers 503.
+    """
+    user = db.get(models.User, token_data.user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    unknown = crud.get_unknown_movie_ids(db, (a.tmdb_movie_id for a in batch.actions))
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown tmdb_movie_id: {sorted(unknown)}",
+        )
+
+    if settings.ACTIONS_WRITE_BEHIND:
+        try:
+            accepted = action_buffer.enqueue(token_data.user_id, batch.actions)
+        except ActionBufferFull:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many actions waiting to be written, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+    else:
+        rows = {
+            (a.tmdb_movie_id, a.action_type): {
+                "user_id": token_data.user_id,
+                "tmdb_movie_id": a.tmdb_movie_id,
+                "action_type": a.action_type,
+                "rating": a.rating,
+            }
+            for a in batch.actions
+        }
+        crud.upsert_user_actions(db, rows.values())
+        db.commit()
+        ranked_cache.invalidate(token_data.user_id)
+        accepted = len(batch.actions)
+        response.status_code = status.HTTP_200_OK
+
+    return {"accepted": accepted}
+
+
+def _encode_cursor(created_at: datetime, action_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{action_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, action_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(action_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get(
     "/actions",
-    response_model=List[schemas.UserAction],
+    response_model=List[schemas.UserActionPartial],
+    response_model_exclude_unset=True,
     status_code=status.HTTP_200_OK,
+    responses=NEGOTIATED_RESPONSES,
 )
 def list_actions(
+    request: Request,
     action_type: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated subset of fields to return"),
     token_data: schemas.TokenData = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     """
-    Retrieve all actions of the current user,
-    optionally filtering by action_type.
+    Retrieve the current user's actions, newest first, optionally filtered
+    by action_type. Pages are keyed on (created_at, id): pass the
+    `X-Next-Cursor` header back as `cursor` for the next page. Send
+    `Accept: application/x-msgpack` for MessagePack.
     """
-    return crud.get_user_actions(db, token_data.user_id, action_type)
+    wanted = schemas.USER_ACTION_FIELDS
+    if fields:
+        wanted = tuple(f.strip() for f in fields.split(",") if f.strip())
+        unknown = set(wanted) - set(schemas.USER_ACTION_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {sorted(unknown)}")
+
+    before = _decode_cursor(cursor) if cursor else None
+    rows = crud.get_user_actions_page(
+        db, token_data.user_id, action_type, limit=limit + 1, before=before, fields=wanted,
+    )
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+    media_type = negotiate(request)
+    body = encode([{f: row[f] for f in wanted} for row in rows], media_type)
+    return encoded_response(body, media_type, headers)
@@ -1,14 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-import requests
+from typing import Any, Dict
 
 from .. import crud, schemas
 from ..database import get_db
+from ..utils.crypto import HashQueueFull, hash_password_async, verify_password_async
+from ..utils.google_auth import (
+    GoogleAuthNotConfigured, GoogleTokenVerifier, InvalidGoogleToken, get_google_verifier,
+)
 from ..utils.security import (
-    verify_password,
-    hash_password,
     create_access_token,
     get_current_user,
 )
@@ -16,30 +19,48 @@ from ..utils.security import (
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _auth_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-in attempts, try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 # === Standard registration ===
 @router.post(
     "/register",
     response_model=schemas.User,
     status_code=status.HTTP_201_CREATED
 )
-def register(
+async def register(
     user: schemas.UserCreate,
     db: Session = Depends(get_db),
 ):
-    if crud.get_user_by_email(db, user.email):
+    # DB calls go to the request threadpool, bcrypt to its own executor
+    if await run_in_threadpool(crud.get_user_by_email, db, user.email):
         raise HTTPException(status_code=400, detail="Email already registered")
-    new_user = crud.create_user(db, user)
+    try:
+        pwd_hash = await hash_password_async(user.password) if user.password else None
+    except HashQueueFull:
+        raise _auth_busy()
+    new_user = await run_in_threadpool(crud.create_user, db, user, pwd_hash)
     return new_user
 
 
 # === Standard login via email/password ===
 @router.post("/login", response_model=schemas.Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = crud.get_user_by_email(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.password_hash):
+    user = await run_in_threadpool(crud.get_user_by_email, db, form_data.username)
+    try:
+        valid = bool(user and user.password_hash) and \
+            await verify_password_async(form_data.password, user.password_hash)
+    except HashQueueFull:
+        raise _auth_busy()
+    if not valid:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     token = create_access_token({"user_id": user.id, "role": user.role})
     return {"access_token": token, "token_type": "bearer"}
@@ -59,20 +80,7 @@ class GoogleToken(BaseModel):
     token: str
 
 
-@router.post("/google", response_model=schemas.Token)
-def google_auth(
-    data: GoogleToken,
-    db: Session = Depends(get_db),
-):
-    # Verify the id_token with Google
-    resp = requests.get(
-        "https://oauth2.googleapis.com/tokeninfo",
-        params={"id_token": data.token}
-    )
-    if resp.status_code != 200:
-        raise HTTPException(status_code=400, detail="Invalid Google token")
-
-    info = resp.json()
+def _google_user(db: Session, info: Dict[str, Any]):
     google_id = info["sub"]
     email     = info.get("email")
     name      = info.get("name") or info.get("email").split("@")[0]
@@ -86,7 +94,28 @@ def google_auth(
             password=None,       # no password for Google signup
             google_id=google_id
         ))
+    return user
+
+
+@router.post("/google", response_model=schemas.Token)
+async def google_auth(
+    data: GoogleToken,
+    db: Session = Depends(get_db),
+    verifier: GoogleTokenVerifier = Depends(get_google_verifier),
+):
+    # Verify the id_token locally against Google's cached signing keys
+    try:
+        info = await verifier.verify(data.token)
+    except InvalidGoogleToken:
+        raise HTTPException(status_code=400, detail="Invalid Google token")
+    except GoogleAuthNotConfigured:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Google sign-in is not configured",
+        )
+
+    user = await run_in_threadpool(_google_user, db, info)
 
     # Generate our own JWT
     token = create_access_token({"user_id": user.id, "role": user.role})
-    return {"access_token": token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": token, "token_type": "bearer"}
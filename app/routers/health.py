@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Response, status
+
+from .. import ranking
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+# async so probes run on the event loop and never wait for a threadpool
+# token, which blocked sync requests can exhaust during an engine build
+@router.get("/live")
+async def live():
+    """The process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready(response: Response):
+    """503 until the recommendation engine has finished its first build."""
+    if not ranking.is_ready():
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "warming"}
+    return {"status": "ready"}
@@ -0,0 +1,20 @@
+from typing import Dict, Optional, Union
+from fastapi import APIRouter, Depends
+
+from ..database import engine, pool_status, read_engine
+from ..utils.crypto import hash_executor
+from ..utils.security import require_service
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/db")
+def db_pools(_service = Depends(require_service)) -> Dict[str, Dict[str, Optional[int]]]:
+    """Connection pool utilization for the primary and read engines."""
+    return {"primary": pool_status(engine), "read": pool_status(read_engine)}
+
+
+@router.get("/auth")
+def auth_hashing(_service = Depends(require_service)) -> Dict[str, Union[int, float]]:
+    """bcrypt executor load: running/queued hashes, rejections and average wait/run times."""
+    return hash_executor.stats()
@@ -1,111 +1,130 @@
-from typing import List, Dict, Tuple
-import numpy as np
-from fastapi import APIRouter, Depends, status
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from ..models import UserMovieAction, Movie, TvShow
-from ..recommender import ContentRecommender
-from ..cf_recommender import CFRecommender
-from ..utils.security import get_current_user
+from .. import crud, schemas
+from ..database import get_db, get_read_db
+from ..ranking import (
+    catalog_meta, item_neighbors, model_generation, rank_for_user, rank_for_users, reset_models,
+)
+from ..rec_cache import ranked_cache
+from ..utils.encoding import NEGOTIATED_RESPONSES, encode, encoded_response, negotiate
+from ..utils.security import get_current_user, require_service
+from ..utils.singleflight import SingleFlight
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 
-ALPHA = 0.6
-
-# ---------- MMR (Maximal Marginal Relevance) ----------
-def mmr_rerank(
-    candidates: List[Tuple[str, int]],
-    emb_lookup: Dict[Tuple[str, int], np.ndarray],
-    lambda_: float = 0.7,
-    k: int = 30,
-) -> List[Tuple[str, int]]:
-   
-    cands = [c for c in candidates if c in emb_lookup]
-    if len(cands) <= 1:
-        return cands[:k]
-
-    X = np.vstack([emb_lookup[c] for c in cands])
-    X_norm = X / (np.linalg.norm(X, axis=1, keepdims=True) + 1e-8)
-    sim = X_norm @ X_norm.T  # (n x n), diag ~ 1
-
-    selected: List[int] = []
-    remaining = list(range(len(cands)))
-
-    first = remaining.pop(0)
-    selected.append(first)
-
-    while remaining and len(selected) < k:
-      best_idx = None
-      best_val = -1e9
-      for r in remaining:
-          rel = -r
-          max_sim = max(sim[r, s] for s in selected)
-          val = lambda_ * rel - (1.0 - lambda_) * max_sim
-          if val > best_val:
-              best_val = val
-              best_idx = r
-      selected.append(best_idx)
-      remaining.remove(best_idx)
-
-    return [cands[i] for i in selected[:k]]
-
-@router.get("/for-you", response_model=List[int])
+# concurrent /for-you calls for the same user and model generation share one ranking
+_ranking_flight = SingleFlight()
+
+
+def _parse_cursor(cursor: Optional[str]) -> int:
+    if cursor is None:
+        return 0
+    try:
+        offset = int(cursor)
+    except ValueError:
+        offset = -1
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+
+def _rank_and_cache(db: Session, primary: Session, user_id: int, generation: int, watermark):
+    ranked = rank_for_user(db, user_id, actions_db=primary)
+    ranked_cache.put(user_id, generation, ranked, watermark)
+    return ranked
+
+
+@router.get("/for-you", response_model=List[schemas.RecommendationItem], responses=NEGOTIATED_RESPONSES)
 def for_you(
+    request: Request,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
     current_user = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
+    primary: Session = Depends(get_db),
 ):
-    cf_scores: Dict[Tuple[str, int], float] = CFRecommender.get_cached(db).get_scores_for_user(current_user.id)
-    cb_scores: Dict[Tuple[str, int], float] = ContentRecommender.get_cached(db).cb_scores_for_user(db, current_user.id)
-
-    seen_ids = {
-        t for (t,) in db.query(UserMovieAction.tmdb_movie_id)
-                        .filter(UserMovieAction.user_id == current_user.id)
-                        .all()
-    }
-
-    def is_seen(key: Tuple[str, int]) -> bool:
-        _mt, tid = key
-        return tid in seen_ids
-
-    ids = set(cf_scores) | set(cb_scores)
-    blended: Dict[Tuple[str, int], float] = {}
-    for key in ids:
-        if is_seen(key):
-            continue
-        blended[key] = ALPHA * cf_scores.get(key, 0.0) + (1.0 - ALPHA) * cb_scores.get(key, 0.0)
-
-    if not blended:
-        return []
-
-    prelim = sorted(blended.items(), key=lambda kv: kv[1], reverse=True)
-    candidate_keys: List[Tuple[str, int]] = [k for k, _ in prelim[:200]]
-
-    cr = ContentRecommender.get_cached(db)
-    emb_lookup: Dict[Tuple[str, int], np.ndarray] = {}
-    if getattr(cr, "mat", None) is not None and cr.mat.shape[0] > 0:
-        for key in candidate_keys:
-            idx = cr.tmdb2idx.get(key)
-            if idx is not None:
-                emb_lookup[key] = cr.mat[idx].toarray().ravel()
-
-    if len(emb_lookup) >= 2:
-        reranked = mmr_rerank(candidate_keys, emb_lookup, lambda_=0.7, k=30)
-    else:
-        reranked = candidate_keys[:30]
-
-    result_movie_ids: List[int] = []
-    for mt, tid in reranked:
-        if mt == "movie":
-            result_movie_ids.append(tid)
-    if len(result_movie_ids) < 10:
-        for mt, tid in candidate_keys:
-            if mt == "movie" and tid not in result_movie_ids:
-                result_movie_ids.append(tid)
-            if len(result_movie_ids) >= 10:
-                break
-
-    return result_movie_ids[:10]
+    """
+    Paged movie and TV recommendations with title/poster metadata. The ranked list is computed once per user and model
+    generation and cached until the user's actions change; follow-up pages pass the `X-Next-Cursor` header back
+    as `cursor`. Send `Accept: application/x-msgpack` for MessagePack.
+    """
+    offset = _parse_cursor(cursor)
+    generation = model_generation()
+    media_type = negotiate(request)
+
+    # the cache is per process: the watermark catches writes handled by other workers
+    watermark = crud.get_action_watermark(primary, current_user.id)
+    ranked = ranked_cache.get(current_user.id, generation, watermark)
+    if ranked is None:
+        ranked = _ranking_flight.do(
+            (current_user.id, generation, watermark), _rank_and_cache,
+            db, primary, current_user.id, generation, watermark,
+        )
+
+    headers = {}
+    if offset + limit < len(ranked):
+        headers["X-Next-Cursor"] = str(offset + limit)
+
+    # encoded pages are cached next to the ranked list, so repeat requests skip
+    # serialization; only real pages on the limit grid, so clients cannot fill
+    # the cache with arbitrary offsets
+    cacheable = offset < len(ranked) and offset % limit == 0
+    page_key = (offset, limit, media_type)
+    body = ranked_cache.get_page(current_user.id, ranked, page_key) if cacheable else None
+    if body is None:
+        body = encode(catalog_meta(db).items(ranked[offset:offset + limit]), media_type)
+        if cacheable:
+            ranked_cache.put_page(current_user.id, ranked, page_key, body)
+    return encoded_response(body, media_type, headers)
+
+
+@router.get(
+    "/similar/{media_type}/{tmdb_id}",
+    response_model=List[schemas.RecommendationItem],
+    responses=NEGOTIATED_RESPONSES,
+)
+def similar_items(
+    request: Request,
+    media_type: Literal["movie", "tv"],
+    tmdb_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    _current_user = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """
+    "More like this" for an item detail page, read from the precomputed
+    neighbor lists. Requires a signed-in user, like the other recommendation
+    routes (a cold call can trigger an engine build).
+    """
+    meta = catalog_meta(db)
+    if (media_type, tmdb_id) not in meta.key2row:
+        raise HTTPException(status_code=404, detail="Item not found")
+    items = meta.items(item_neighbors(db).similar((media_type, tmdb_id), limit))
+    content_type = negotiate(request)
+    return encoded_response(encode(items, content_type), content_type)
+
+
+@router.post("/batch", response_class=StreamingResponse)
+def batch_recommendations(
+    req: schemas.BatchRecommendationRequest,
+    _service = Depends(require_service),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Recommendations for many users at once (email/push jobs). Streams one
+    `UserRecommendations` JSON object per line (NDJSON).
+    """
+    meta = catalog_meta(db)
+    results = rank_for_users(db, req.user_ids, req.limit)
+
+    def _lines():
+        for user_id, ranked in results:
+            yield schemas.UserRecommendations(user_id=user_id, items=meta.items(ranked)).model_dump_json() + "\n"
+
+    return StreamingResponse(_lines(), media_type="application/x-ndjson")
 
 
 @router.post("/retrain", status_code=status.HTTP_204_NO_CONTENT)
@@ -113,6 +132,6 @@ def retrain_models(
     _current_user = Depends(get_current_user),
     _db: Session = Depends(get_db),
 ):
-    ContentRecommender.reset_cache()
-    CFRecommender.reset_cache()
+    reset_models()
+    ranked_cache.clear()
     return
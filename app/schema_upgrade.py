@@ -0,0 +1,87 @@
+"""
+Brings an existing database up to the indexes and unique constraints
+declared on the models. create_all() only creates missing tables, never
+indexes on tables that already exist, so run this once after upgrading:
+
+    python -m app.schema_upgrade
+
+Every statement is idempotent. On PostgreSQL indexes are built
+CONCURRENTLY (no write lock); a unique constraint is created as a unique
+index of the same name, which is all INSERT ... ON CONFLICT needs.
+"""
+import argparse, logging
+from typing import Iterator, List, Tuple
+
+from sqlalchemy import Table, UniqueConstraint, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+
+from .database import Base, engine as primary_engine
+from . import models  # noqa: F401  registers the tables on Base
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)-8s %(message)s")
+log = logging.getLogger(__name__)
+
+# (index name, table, columns, unique)
+IndexSpec = Tuple[str, str, List[str], bool]
+
+
+def declared_indexes(table: Table) -> Iterator[IndexSpec]:
+    for idx in table.indexes:
+        yield idx.name, table.name, [c.name for c in idx.columns], bool(idx.unique)
+    for con in table.constraints:
+        if isinstance(con, UniqueConstraint) and con.name:
+            yield con.name, table.name, [c.name for c in con.columns], True
+
+
+def _drop_invalid(conn, name: str) -> None:
+    """A failed CONCURRENTLY build leaves an INVALID index that IF NOT EXISTS would skip."""
+    invalid = conn.execute(
+        text("SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+             "WHERE c.relname = :name AND NOT i.indisvalid"),
+        {"name": name},
+    ).first()
+    if invalid:
+        log.warning("dropping invalid index %s left by an earlier failed build", name)
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+
+
+def upgrade(eng: Engine) -> int:
+    """Creates every declared index missing from existing tables; returns how many failed."""
+    postgres = eng.dialect.name == "postgresql"
+    existing = set(inspect(eng).get_table_names())
+    failed = 0
+    # CONCURRENTLY cannot run inside a transaction block
+    with eng.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing:
+                continue  # create_all builds it with all its indexes
+            for name, table_name, columns, unique in declared_indexes(table):
+                if postgres:
+                    _drop_invalid(conn, name)
+                cols = ", ".join(f'"{c}"' for c in columns)
+                ddl = (
+                    f"CREATE {'UNIQUE ' if unique else ''}INDEX {'CONCURRENTLY ' if postgres else ''}"
+                    f'IF NOT EXISTS "{name}" ON "{table_name}" ({cols})'
+                )
+                try:
+                    conn.execute(text(ddl))
+                    log.info("ok: %s", ddl)
+                except DBAPIError as exc:
+                    failed += 1
+                    log.error("failed: %s (%s)", ddl, exc.orig)
+                    if unique:
+                        log.error("remove duplicate (%s) rows from %s and run again", ", ".join(columns), table_name)
+    return failed
+
+
+def main():
+    argparse.ArgumentParser(description="Create indexes and unique constraints missing from existing tables").parse_args()
+    failed = upgrade(primary_engine)
+    if failed:
+        raise SystemExit(f"{failed} statement(s) failed")
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from datetime import datetime
-from typing import Optional, Literal
-from pydantic import BaseModel, EmailStr
+from typing import List, Optional, Literal
+from pydantic import BaseModel, EmailStr, Field
 
 # ───── User schemas ──────────────────────────────────────────────────────────
 
@@ -35,14 +35,24 @@ class TokenData(BaseModel):
 
 # ───── User–Movie Action schemas ─────────────────────────────────────────────
 
+# limits of the user_movie_actions columns (String(20), SmallInteger)
+ACTION_TYPE_MAX_LENGTH = 20
+RATING_BOUNDS = (-2**15, 2**15 - 1)
+
 class UserActionBase(BaseModel):
     tmdb_movie_id: int
-    action_type: str      # e.g., "like", "watchlist", "rating"
-    rating: Optional[int] = None
+    action_type: str = Field(..., min_length=1, max_length=ACTION_TYPE_MAX_LENGTH)  # e.g., "like", "watchlist", "rating"
+    rating: Optional[int] = Field(None, ge=RATING_BOUNDS[0], le=RATING_BOUNDS[1])
 
 class UserActionCreate(UserActionBase):
     pass
 
+class UserActionBatch(BaseModel):
+    actions: List[UserActionCreate] = Field(..., min_length=1, max_length=1000)
+
+class UserActionBatchResult(BaseModel):
+    accepted: int
+
 class UserAction(UserActionBase):
     id: int
     user_id: int
@@ -52,6 +62,17 @@ class UserAction(UserActionBase):
         "from_attributes": True,
     }
 
+class UserActionPartial(BaseModel):
+    """UserAction where any field may be left out (field projection)."""
+    id: Optional[int] = None
+    user_id: Optional[int] = None
+    tmdb_movie_id: Optional[int] = None
+    action_type: Optional[str] = None
+    rating: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+USER_ACTION_FIELDS = tuple(UserActionPartial.model_fields)
+
 # ───── Recommendation schemas ────────────────────────────────────────────────
 
 class RecommendationItem(BaseModel):
@@ -60,3 +81,11 @@ class RecommendationItem(BaseModel):
     title: Optional[str] = None
     poster_path: Optional[str] = None
     score: Optional[float] = None
+
+class BatchRecommendationRequest(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=10000)
+    limit: int = Field(10, ge=1, le=100)
+
+class UserRecommendations(BaseModel):
+    user_id: int
+    items: List[RecommendationItem]
@@ -0,0 +1,53 @@
+"""In-memory ring buffer of each user's most recent actions, for session-aware ranking."""
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, List, NamedTuple, Optional
+
+from .config import settings
+
+
+class SessionEvent(NamedTuple):
+    tmdb_id: int
+    action_type: str
+    rating: Optional[int]
+    ts: float  # epoch seconds
+
+
+class SessionBuffer:
+    """
+    The last `size` actions per user, for up to `max_users` users (least
+    recently active evicted first). Per process and lost on restart, which
+    only means a fresh session; the full history stays in the database.
+    """
+
+    def __init__(self, size: int, max_users: int) -> None:
+        self.size = size
+        self.max_users = max_users
+        self._data: "OrderedDict[int, Deque[SessionEvent]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, user_id: int, tmdb_id: int, action_type: str, rating: Optional[int] = None,
+               ts: Optional[float] = None) -> None:
+        event = SessionEvent(tmdb_id, action_type, rating, time.time() if ts is None else ts)
+        with self._lock:
+            events = self._data.get(user_id)
+            if events is None:
+                events = self._data[user_id] = deque(maxlen=self.size)
+            events.append(event)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.max_users:
+                self._data.popitem(last=False)
+
+    def recent(self, user_id: int) -> List[SessionEvent]:
+        """Oldest first."""
+        with self._lock:
+            return list(self._data.get(user_id, ()))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+session_buffer = SessionBuffer(settings.SESSION_SIZE, settings.SESSION_MAX_USERS)
@@ -1,5 +1,15 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar, Union
+
 from passlib.context import CryptContext
 
+from ..config import settings
+
+T = TypeVar("T")
+
 _pwd = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
@@ -7,3 +17,81 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
     return _pwd.verify(plain_password, password_hash)
+
+# ───── Bounded executor for the async auth endpoints ──────────────────────────
+
+class HashQueueFull(Exception):
+    """Too many password hashes are already waiting; the caller should back off."""
+
+
+class HashExecutor:
+    """
+    Runs bcrypt on its own small thread pool instead of the shared request
+    threadpool, so a login burst queues here rather than stalling other
+    endpoints. At most `max_pending` calls may be queued or running.
+    """
+
+    def __init__(self, workers: int, max_pending: int) -> None:
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HashQueueFull()
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def _timed():
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+                self._wait_total += started - submitted
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._run_total += time.perf_counter() - started
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, _timed)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        with self._lock:
+            done = max(self._completed, 1)
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": 1000 * self._wait_total / done,
+                "avg_run_ms": 1000 * self._run_total / done,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+hash_executor = HashExecutor(settings.AUTH_HASH_WORKERS, settings.AUTH_HASH_MAX_PENDING)
+
+async def hash_password_async(password: str) -> str:
+    return await hash_executor.run(hash_password, password)
+
+async def verify_password_async(plain_password: str, password_hash: str) -> bool:
+    return await hash_executor.run(verify_password, plain_password, password_hash)
@@ -0,0 +1,40 @@
+"""Response body encoding with Accept-header negotiation (JSON or MessagePack)."""
+from typing import Any, Dict, Optional
+
+import msgpack
+from fastapi import Request, Response
+from pydantic_core import to_json, to_jsonable_python
+
+JSON = "application/json"
+MSGPACK = "application/x-msgpack"
+
+_MSGPACK_ALIASES = (MSGPACK, "application/msgpack")
+
+# OpenAPI `responses=` entry for endpoints that can answer in either format
+NEGOTIATED_RESPONSES: Dict[int, Dict[str, Any]] = {
+    200: {"content": {MSGPACK: {}}, "description": "JSON by default, MessagePack on request"},
+}
+
+
+def negotiate(request: Request) -> str:
+    """Media type to answer with: MessagePack if the client asks for it, else JSON."""
+    accept = request.headers.get("accept", "")
+    if any(alias in accept for alias in _MSGPACK_ALIASES):
+        return MSGPACK
+    return JSON
+
+
+def encode(content: Any, media_type: str) -> bytes:
+    """
+    Serialize pydantic models, dicts and lists straight to bytes, skipping
+    FastAPI's jsonable_encoder pass. Datetimes become ISO strings in both formats.
+    """
+    if media_type == MSGPACK:
+        return msgpack.packb(to_jsonable_python(content), use_bin_type=True)
+    return to_json(content)
+
+
+def encoded_response(body: bytes, media_type: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    response = Response(content=body, media_type=media_type, headers=headers)
+    response.headers["Vary"] = "Accept"
+    return response
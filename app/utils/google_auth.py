@@ -0,0 +1,156 @@
+"""Local verification of Google ID tokens against Google's cached JWKS signing keys."""
+import asyncio
+import re
+import time
+from typing import Any, Dict, Optional, Protocol, Tuple
+
+import httpx
+from jose import jwt, JWTError
+
+from ..config import settings
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+# at most one key fetch per this many seconds, however many tokens name an
+# unknown key id or arrive while Google's endpoint is failing
+MIN_REFRESH_INTERVAL = 30.0
+
+
+class InvalidGoogleToken(Exception):
+    pass
+
+
+class GoogleAuthNotConfigured(Exception):
+    """GOOGLE_CLIENT_ID is unset; without it any Google client's tokens would be accepted."""
+
+
+# ───── Key sources ────────────────────────────────────────────────────────────
+
+class KeySource(Protocol):
+    async def fetch(self) -> Tuple[Dict[str, Any], Optional[float]]:
+        """Returns the JWKS document and, if known, how many seconds it stays valid."""
+        ...
+
+
+class HttpKeySource:
+    """Google's certs endpoint over a shared, pooled HTTP client."""
+
+    def __init__(self, url: str = GOOGLE_CERTS_URL, timeout: float = 5.0) -> None:
+        self.url = url
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=2),
+            )
+        return self._client
+
+    async def fetch(self) -> Tuple[Dict[str, Any], Optional[float]]:
+        resp = await self.client.get(self.url)
+        resp.raise_for_status()
+        match = _MAX_AGE.search(resp.headers.get("cache-control", ""))
+        return resp.json(), float(match.group(1)) if match else None
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class StaticKeySource:
+    """Fixed JWKS, for tests and offline environments."""
+
+    def __init__(self, jwks: Dict[str, Any]) -> None:
+        self.jwks = jwks
+
+    async def fetch(self) -> Tuple[Dict[str, Any], Optional[float]]:
+        return self.jwks, None
+
+
+# ───── Verifier ───────────────────────────────────────────────────────────────
+
+class GoogleTokenVerifier:
+    """
+    Verifies ID token signatures and claims locally. Keys are cached until
+    the certs response's max-age (or `ttl`) runs out, and refreshed early
+    when a token names an unknown key id, since Google rotates keys.
+    """
+
+    def __init__(self, source: KeySource, client_id: Optional[str], ttl: float) -> None:
+        self.source = source
+        self.client_id = client_id
+        self.ttl = ttl
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._expires_at = 0.0
+        self._fetched_at = float("-inf")
+        self._refresh_lock = asyncio.Lock()
+
+    async def _refresh(self, stale_keys: Dict[str, Dict[str, Any]]) -> None:
+        async with self._refresh_lock:
+            if self._keys is not stale_keys:  # another request refreshed meanwhile
+                return
+            self._fetched_at = time.monotonic()
+            jwks, max_age = await self.source.fetch()
+            self._keys = {k["kid"]: k for k in jwks.get("keys", []) if "kid" in k}
+            self._expires_at = time.monotonic() + (max_age if max_age is not None else self.ttl)
+
+    async def _key(self, kid: str) -> Dict[str, Any]:
+        keys = self._keys
+        now = time.monotonic()
+        stale = now >= self._expires_at or kid not in keys
+        if stale and now - self._fetched_at >= MIN_REFRESH_INTERVAL:
+            try:
+                await self._refresh(keys)
+            except (httpx.HTTPError, ValueError) as exc:
+                if kid not in keys:
+                    raise InvalidGoogleToken("Could not load Google signing keys") from exc
+                # fetch failed but the cached key is still usable
+        key = self._keys.get(kid) or keys.get(kid)
+        if key is None:
+            raise InvalidGoogleToken("Unknown signing key")
+        return key
+
+    async def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Claims of a valid Google ID token issued to our client id for a
+        verified email address; raises InvalidGoogleToken otherwise, and
+        GoogleAuthNotConfigured if no client id is set.
+        """
+        if not self.client_id:
+            raise GoogleAuthNotConfigured()
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError as exc:
+            raise InvalidGoogleToken("Malformed token") from exc
+        key = await self._key(header.get("kid", ""))
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=["RS256"],
+                audience=self.client_id,
+                issuer=GOOGLE_ISSUERS,
+                options={"verify_at_hash": False},
+            )
+        except JWTError as exc:
+            raise InvalidGoogleToken(str(exc)) from exc
+        # Google sends a bool, but older tokens carried the string "true"
+        if claims.get("email_verified") not in (True, "true"):
+            raise InvalidGoogleToken("Email address not verified")
+        return claims
+
+
+google_key_source = HttpKeySource()
+google_verifier = GoogleTokenVerifier(google_key_source, settings.GOOGLE_CLIENT_ID, settings.GOOGLE_JWKS_TTL)
+
+
+def get_google_verifier() -> GoogleTokenVerifier:
+    """Dependency; override it (or swap the verifier's source) to stub Google in tests."""
+    return google_verifier
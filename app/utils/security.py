@@ -4,7 +4,6 @@ from typing import Annotated
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
 from ..database import get_db
@@ -13,13 +12,7 @@ from ..config import settings
 
 # ───── Password hashing ────────────────────────────────────────────────────────
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+from .crypto import hash_password, verify_password  # noqa: F401  (re-exported)
 
 # ───── JWT token creation ─────────────────────────────────────────────────────
 
@@ -55,4 +48,15 @@ def get_current_user(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
     # convert to Pydantic User
-    return schemas.User.from_orm(user_obj)
\ No newline at end of file
+    return schemas.User.from_orm(user_obj)
+
+# ───── Internal service access ────────────────────────────────────────────────
+
+SERVICE_ROLES = {"admin", "service"}
+
+def require_service(
+    current_user: Annotated[schemas.User, Depends(get_current_user)],
+) -> schemas.User:
+    if current_user.role not in SERVICE_ROLES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    return current_user